@@ -0,0 +1,224 @@
+# benchmarks/overhead.py
+"""Offline benchmarks of hub's own overhead, using the ``mock`` provider.
+
+Every provider delay is set to zero, so the numbers are what hub itself
+costs: process startup for a one-shot call, ``cli.main`` in-process, the
+per-chunk cost of streaming through ``InteractiveSession.process_message``,
+``/compact`` on a long history and ``/export``, plus peak memory.
+
+    python benchmarks/overhead.py [--only stream,compact] [--json results.json]
+    python benchmarks/overhead.py --baseline results.json [--tolerance 0.25]
+
+With ``--baseline`` the run exits with status 1 if any metric is slower
+(or larger) than the baseline by more than the tolerance.
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hub import cli  # noqa: E402
+from hub.config import Config  # noqa: E402
+
+BENCHMARKS = ("startup", "oneshot", "stream", "compact", "export")
+
+
+class NullWriter:
+    """Stands in for the terminal; counts what would have been written."""
+    
+    def __init__(self):
+        self.bytes = 0
+    
+    def write(self, text: str) -> int:
+        self.bytes += len(text)
+        return len(text)
+    
+    def flush(self):
+        pass
+    
+    def isatty(self) -> bool:
+        return False
+
+
+def write_config(directory: str, **mock) -> str:
+    settings = {"ttft": 0.0, "chunk_delay": 0.0, "chunk_chars": 4, "response_chars": 2000}
+    settings.update(mock)
+    path = os.path.join(directory, "config.yaml")
+    with open(path, "w") as f:
+        json.dump({"default_model": "mock", "prewarm": False, "mock": settings}, f)
+    return path
+
+
+def new_session(config_path: str):
+    from hub.interactive import InteractiveSession
+    config = Config(config_path)
+    client = cli.build_client("mock", config)
+    return InteractiveSession(client, config)
+
+
+def bench_startup(workdir: str, runs: int) -> dict:
+    config_path = write_config(workdir, response_chars=200)
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    
+    def timed(argv):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        return time.perf_counter() - start
+    
+    interpreter = statistics.median(timed([sys.executable, "-c", "pass"]) for _ in range(runs))
+    hub = statistics.median(
+        timed([sys.executable, "-m", "hub.main", "-c", config_path, "-m", "mock", "hello"]) for _ in range(runs)
+    )
+    return {"startup_ms": hub * 1000, "startup_over_python_ms": (hub - interpreter) * 1000}
+
+
+def bench_oneshot(workdir: str, runs: int) -> dict:
+    config_path = write_config(workdir, response_chars=200)
+    argv = sys.argv
+    times = []
+    try:
+        for _ in range(runs):
+            sys.argv = ["hub", "-c", config_path, "-m", "mock", "hello"]
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(NullWriter()):
+                cli.main()
+            times.append(time.perf_counter() - start)
+    finally:
+        sys.argv = argv
+    return {"oneshot_ms": statistics.median(times) * 1000}
+
+
+def bench_stream(workdir: str, chunks: int) -> dict:
+    config_path = write_config(workdir, response_chars=chunks * 4)
+    session = new_session(config_path)
+    
+    # The mock's own cost of producing the chunks, subtracted below
+    start = time.perf_counter()
+    for _ in session.client.chat_stream("hello"):
+        pass
+    produce = time.perf_counter() - start
+    
+    sink = NullWriter()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        session.process_message("hello")
+    elapsed = time.perf_counter() - start
+    
+    tracemalloc.start()
+    with contextlib.redirect_stdout(NullWriter()):
+        session.process_message("hello again")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        session.close()
+    
+    return {
+        "stream_per_chunk_us": (elapsed - produce) / chunks * 1e6,
+        "stream_total_ms": elapsed * 1000,
+        "stream_peak_mb": peak / 2**20,
+    }
+
+
+def bench_compact(workdir: str, turns: int) -> dict:
+    config_path = write_config(workdir)
+    session = new_session(config_path)
+    with contextlib.redirect_stdout(NullWriter()):
+        for i in range(turns):
+            session.process_message(f"question {i}")
+        requests = session.compactor.requests
+        start = time.perf_counter()
+        session.compact_conversation("Summarize our conversation")
+        elapsed = time.perf_counter() - start
+        session.close()
+    return {"compact_ms": elapsed * 1000, "compact_requests": session.compactor.requests - requests}
+
+
+def bench_export(workdir: str, turns: int) -> dict:
+    config_path = write_config(workdir)
+    session = new_session(config_path)
+    session.conversation_history = [
+        {"user": f"question {i}", "assistant": "answer " * 300} for i in range(turns)
+    ]
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(NullWriter()):
+            session.export_conversation()
+            elapsed = time.perf_counter() - start
+            session.close()
+    finally:
+        os.chdir(cwd)
+    return {"export_ms": elapsed * 1000}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics worse than the baseline by more than ``tolerance`` (all are lower-is-better)."""
+    regressions = []
+    for name, value in results.items():
+        before = baseline.get(name)
+        if before and value > before * (1 + tolerance):
+            regressions.append((name, before, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="Comma-separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions for startup and one-shot timings")
+    parser.add_argument("--chunks", type=int, default=50000, help="Chunks in the streaming benchmark")
+    parser.add_argument("--turns", type=int, default=200, help="History length for /compact and /export")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Fail on regressions against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    
+    selected = args.only.split(",") if args.only else BENCHMARKS
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in selected:
+            directory = os.path.join(workdir, name)
+            os.makedirs(directory)
+            if name == "startup":
+                results.update(bench_startup(directory, args.runs))
+            elif name == "oneshot":
+                results.update(bench_oneshot(directory, args.runs))
+            elif name == "stream":
+                results.update(bench_stream(directory, args.chunks))
+            elif name == "compact":
+                results.update(bench_compact(directory, args.turns))
+            elif name == "export":
+                results.update(bench_export(directory, args.turns))
+            else:
+                parser.error(f"unknown benchmark: {name}")
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["max_rss_mb"] = maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    
+    for name, value in results.items():
+        print(f"{name:<26} {value:>10.2f}")
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.2f} -> {after:.2f}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# benchmarks/stream_render.py
+"""Per-chunk cost of rendering a streamed response.
+
+Compares the old loop (``text += chunk`` plus a flushed print per chunk)
+with hub.utils.stream.StreamPipeline on synthetic streams of up to 100k
+chunks (about one token each), written to a throttled sink that mimics a
+slow terminal.
+    
+    python benchmarks/stream_render.py [--sizes 10000,50000,100000] [--sink-latency-us 20]
+
+With ``--cassette FILE`` (a recording made with ``hub --record DIR``) the
+chunks of that real response are cycled instead of synthetic words.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hub.utils.stream import StreamPipeline  # noqa: E402
+
+
+class SlowSink:
+    """Counts bytes; every flush costs ``latency`` seconds, like a terminal over SSH."""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.bytes = 0
+        self.flushes = 0
+    
+    def write(self, text: str):
+        self.bytes += len(text)
+    
+    def flush(self):
+        self.flushes += 1
+        if self.latency:
+            deadline = time.perf_counter() + self.latency
+            while time.perf_counter() < deadline:
+                pass
+
+
+WORDS = ["lorem ", "ipsum ", "dolor ", "sit ", "amet, ", "consectetur\n"]
+
+
+def synthetic_stream(n: int, words=WORDS):
+    for i in range(n):
+        yield words[i % len(words)]
+
+
+def naive(n: int, sink: SlowSink, words=WORDS) -> str:
+    response_text = ""
+    for chunk in synthetic_stream(n, words):
+        sink.write(chunk)
+        sink.flush()
+        response_text += chunk
+    return response_text
+
+
+def pipeline(n: int, sink: SlowSink, words=WORDS) -> str:
+    return StreamPipeline(synthetic_stream(n, words), write=sink.write, flush=sink.flush).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,50000,100000")
+    parser.add_argument("--sink-latency-us", type=float, default=20.0)
+    parser.add_argument("--cassette", metavar="FILE", help="Cycle the chunks of a recorded response")
+    args = parser.parse_args()
+    
+    words = WORDS
+    if args.cassette:
+        with open(args.cassette, "r", encoding="utf-8") as f:
+            words = [chunk for _, chunk in json.load(f)["chunks"]] or WORDS
+    
+    latency = args.sink_latency_us / 1e6
+    print(f"{'chunks':>8} {'mode':<9} {'total':>9} {'per chunk':>11} {'flushes':>8}")
+    for n in (int(size) for size in args.sizes.split(",")):
+        for name, render in (("naive", naive), ("pipeline", pipeline)):
+            sink = SlowSink(latency)
+            start = time.perf_counter()
+            text = render(n, sink, words)
+            elapsed = time.perf_counter() - start
+            assert len(text) == sink.bytes
+            print(f"{n:>8} {name:<9} {elapsed:>8.3f}s {elapsed / n * 1e6:>9.2f}us {sink.flushes:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# hub/batch.py
+import asyncio
+import json
+import sys
+import time
+from typing import Callable, Dict, IO, Optional, Tuple
+
+from .clients import registry
+from .clients.base import BaseClient
+from .metrics import current_stream_metrics
+from .utils.formatting import print_error
+
+
+class BatchRunner:
+    """Runs a JSONL file of prompts through the async client API.
+    
+    Input lines are JSON objects with a ``prompt`` and optional ``id``,
+    ``model`` and ``system_prompt``. Lines are read lazily and at most
+    ``concurrency`` requests are in flight, so memory stays flat however
+    large the input is. Each result is written as soon as it completes.
+    With ``metrics`` on, requests are streamed and each record gets the
+    stream's latency metrics.
+    """
+    
+    def __init__(self, client_factory: Callable[[str], Optional[BaseClient]], default_model: str,
+                 concurrency: int = 8, system_prompt: Optional[str] = None, metrics: bool = False):
+        self.client_factory = client_factory
+        self.metrics = metrics
+        self.default_model = default_model
+        self.concurrency = max(1, concurrency)
+        self.system_prompt = system_prompt
+        self._clients: Dict[str, Optional[BaseClient]] = {}
+        self.completed = 0
+        self.failed = 0
+    
+    def _get_client(self, model: str) -> Optional[BaseClient]:
+        # One client per model, shared by every record routed to it
+        if model not in self._clients:
+            self._clients[model] = self.client_factory(model)
+        return self._clients[model]
+    
+    def _parse_line(self, line_no: int, line: str) -> Tuple[dict, Optional[str]]:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return {"id": line_no}, f"Invalid JSON: {e}"
+        if isinstance(record, str):
+            record = {"prompt": record}
+        if not isinstance(record, dict):
+            return {"id": line_no}, "Record must be a JSON object"
+        record.setdefault("id", line_no)
+        if not record.get("prompt"):
+            return record, "Missing prompt"
+        return record, None
+    
+    async def _process(self, line_no: int, line: str) -> dict:
+        record, error = self._parse_line(line_no, line)
+        model = record.get("model") or self.default_model
+        result = {"id": record["id"], "provider": None, "model": model}
+        
+        if error is None:
+            try:
+                result["provider"] = registry.resolve_model(model).name
+            except ValueError as e:
+                error = str(e)
+        
+        client = None
+        if error is None:
+            client = self._get_client(model)
+            if client is None:
+                error = f"Could not create client for model: {model}"
+            else:
+                result["model"] = client.model_name
+        
+        start = time.perf_counter()
+        if error is None:
+            try:
+                system_prompt = record.get("system_prompt", self.system_prompt)
+                if self.metrics:
+                    chunks = [chunk async for chunk in client.achat_stream(record["prompt"], system_prompt)]
+                    result["response"] = "".join(chunks)
+                    metrics = current_stream_metrics()
+                    if metrics is not None:
+                        result["metrics"] = metrics.as_dict()
+                else:
+                    result["response"] = await client.achat(record["prompt"], system_prompt)
+            except Exception as e:
+                error = str(e)
+        result["latency"] = round(time.perf_counter() - start, 4)
+        
+        result["ok"] = error is None
+        if error is not None:
+            result["error"] = error
+        return result
+    
+    async def run(self, input_file: IO[str], output_file: IO[str]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = set()
+        
+        async def worker(line_no: int, line: str):
+            try:
+                result = await self._process(line_no, line)
+            finally:
+                semaphore.release()
+            self.completed += 1
+            if not result["ok"]:
+                self.failed += 1
+            output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output_file.flush()
+        
+        for line_no, line in enumerate(input_file, 1):
+            if not line.strip():
+                continue
+            # Blocks reading further input until a slot frees up
+            await semaphore.acquire()
+            task = asyncio.ensure_future(worker(line_no, line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        
+        if pending:
+            await asyncio.gather(*pending)
+
+
+def run_batch(input_path: str, output_path: Optional[str], client_factory: Callable[[str], Optional[BaseClient]],
+              default_model: str, concurrency: int = 8, system_prompt: Optional[str] = None,
+              metrics: bool = False) -> int:
+    runner = BatchRunner(client_factory, default_model, concurrency, system_prompt, metrics)
+    start = time.perf_counter()
+    
+    try:
+        input_file = sys.stdin if input_path == "-" else open(input_path, "r", encoding="utf-8")
+    except OSError as e:
+        print_error(f"Cannot open batch input: {e}")
+        return 1
+    
+    try:
+        output_file = sys.stdout if not output_path or output_path == "-" else open(output_path, "w", encoding="utf-8")
+    except OSError as e:
+        print_error(f"Cannot open batch output: {e}")
+        return 1
+    
+    try:
+        asyncio.run(runner.run(input_file, output_file))
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    
+    elapsed = time.perf_counter() - start
+    print(f"Processed {runner.completed} records ({runner.failed} failed) in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if runner.failed else 0
@@ -0,0 +1,376 @@
+# hub/cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import AsyncGenerator, Generator, List, Optional, Tuple
+
+from .clients.base import BaseClient, Messages, normalize_messages, set_current_usage, usage_dict
+from .clients.wrapper import ClientWrapper
+from .metrics import set_current_stream_metrics
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_TIMESTAMP = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[t ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?\b"
+    r"|\b1\d{9}(?:\.\d+)?\b"
+)
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# Replayed cache hits are split into word-sized chunks so streaming output
+# renders the same way as a live response.
+_REPLAY_CHUNK = re.compile(r"\S+\s*|\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Fold case, timestamps and whitespace so near-duplicate prompts compare equal."""
+    text = _TIMESTAMP.sub(" <ts> ", text.lower())
+    return " ".join(text.split())
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over the tokens and token bigrams of ``text``."""
+    tokens = _TOKEN.findall(text)
+    features = tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    bitstrings = [
+        format(int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for f in features
+    ]
+    # Column-wise majority vote; zip keeps the per-bit loop in C
+    half = len(bitstrings) / 2
+    bits = "".join("1" if column.count("1") > half else "0" for column in zip(*bitstrings))
+    return int(bits, 2)
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _bands(fingerprint: int) -> List[int]:
+    return [(fingerprint >> (i * _BAND_BITS)) & _BAND_MASK for i in range(SIMHASH_BANDS)]
+
+
+class ResponseCache:
+    """SQLite-backed response cache with age and size based LRU eviction.
+    
+    Entries expire ``ttl`` seconds after they were written. When the stored
+    responses exceed ``max_bytes`` the least recently read entries are
+    dropped until the cache is back under 90% of the limit.
+    
+    With ``fuzzy_threshold`` set, prompts are also indexed by SimHash so a
+    near-duplicate prompt (same scope, similarity >= threshold) is served
+    from the cache. Fingerprints are split into four 16-bit bands, each
+    with its own index, so a lookup only compares the handful of entries
+    sharing a band. Any match within 3 differing bits (similarity >= 0.95)
+    is guaranteed to share a band; lower thresholds match probabilistically.
+    """
+    
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES,
+                 fuzzy_threshold: Optional[float] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.fuzzy_threshold = fuzzy_threshold
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " key TEXT PRIMARY KEY,"
+            " scope INTEGER NOT NULL,"
+            " simhash INTEGER NOT NULL,"
+            " b0 INTEGER NOT NULL, b1 INTEGER NOT NULL, b2 INTEGER NOT NULL, b3 INTEGER NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        for band in range(SIMHASH_BANDS):
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS fingerprints_b{band} ON fingerprints (scope, b{band})"
+            )
+        self._db.execute("CREATE INDEX IF NOT EXISTS fingerprints_created ON fingerprints (created)")
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: Optional[str], messages: List[dict],
+                 temperature: Optional[float], max_tokens: Optional[int]) -> str:
+        payload = json.dumps(
+            [provider, model, system_prompt, messages, temperature, max_tokens],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def make_scope(provider: str, model: str, system_prompt: Optional[str],
+                   temperature: Optional[float], max_tokens: Optional[int],
+                   history: Optional[List[dict]] = None) -> int:
+        """Everything except the prompt itself; fuzzy matches never cross scopes.
+        
+        ``history`` holds the turns before the prompt, so a follow-up only
+        matches near-identical follow-ups in the same conversation.
+        """
+        payload = json.dumps(
+            [provider, model, system_prompt, temperature, max_tokens, history or []],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        digest = hashlib.sha256(payload.encode("utf-8")).digest()
+        return _to_signed(int.from_bytes(digest[:8], "big"))
+    
+    def _read(self, key: str, now: float) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT response, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (self.ttl and now - row[1] > self.ttl):
+            return None
+        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+    
+    def _read_similar(self, scope: int, text: str, now: float) -> Optional[str]:
+        fingerprint = simhash(normalize_prompt(text))
+        max_distance = int((1 - self.fuzzy_threshold) * SIMHASH_BITS)
+        query = " UNION ".join(
+            f"SELECT key, simhash FROM fingerprints WHERE scope = ? AND b{band} = ?"
+            for band in range(SIMHASH_BANDS)
+        )
+        params = []
+        for value in _bands(fingerprint):
+            params.extend((scope, value))
+        
+        candidates = []
+        for key, stored in self._db.execute(query, params):
+            distance = bin((stored & 0xFFFFFFFFFFFFFFFF) ^ fingerprint).count("1")
+            if distance <= max_distance:
+                candidates.append((distance, key))
+        
+        for _, key in sorted(candidates):
+            response = self._read(key, now)
+            if response is not None:
+                return response
+            # Response was evicted; drop its fingerprint too
+            self._db.execute("DELETE FROM fingerprints WHERE key = ?", (key,))
+        return None
+    
+    def get(self, key: str, scope: Optional[int] = None, text: Optional[str] = None) -> Optional[str]:
+        """Look up ``key``, falling back to a near-duplicate of ``text`` when fuzzy matching is on."""
+        now = time.time()
+        with self._lock:
+            response = self._read(key, now)
+            if response is not None:
+                self.hits += 1
+                return response
+            if self.fuzzy_threshold and scope is not None and text is not None:
+                response = self._read_similar(scope, text, now)
+                if response is not None:
+                    self.fuzzy_hits += 1
+                    return response
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, response: str, scope: Optional[int] = None, text: Optional[str] = None):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._size += size - (old[0] if old else 0)
+            if self.fuzzy_threshold and scope is not None and text is not None:
+                fingerprint = simhash(normalize_prompt(text))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO fingerprints (key, scope, simhash, b0, b1, b2, b3, created)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, scope, _to_signed(fingerprint), *_bands(fingerprint), now),
+                )
+            self._evict(now)
+    
+    def _evict(self, now: float):
+        if self.ttl:
+            cursor = self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            if cursor.rowcount:
+                self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self._db.execute("DELETE FROM fingerprints WHERE created < ?", (now - self.ttl,))
+        
+        if self._size <= self.max_bytes:
+            return
+        
+        target = self._size - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self._db.executemany("DELETE FROM fingerprints WHERE key = ?", stale)
+        self._size -= freed
+    
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.execute("DELETE FROM fingerprints")
+            self._size = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": self._size,
+        }
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def replay_chunks(text: str) -> Generator[str, None, None]:
+    for match in _REPLAY_CHUNK.finditer(text):
+        yield match.group(0)
+
+
+class CachedClient(ClientWrapper):
+    """Serves repeated requests from a ResponseCache instead of the provider."""
+    
+    def __init__(self, wrapped: BaseClient, cache: ResponseCache):
+        super().__init__(wrapped)
+        self.cache = cache
+        self._last_hit = False
+    
+    @property
+    def last_usage(self):
+        # A cache hit costs no provider tokens
+        if self._last_hit:
+            return usage_dict()
+        return self.wrapped.last_usage
+    
+    def reset_usage(self):
+        self._last_hit = False
+        self.wrapped.reset_usage()
+    
+    def _lookup(self, key: str, messages: Messages, system_prompt: Optional[str]) -> Optional[str]:
+        cached = self._get(key, messages, system_prompt)
+        self._last_hit = cached is not None
+        if cached is not None:
+            set_current_usage(usage_dict())
+        return cached
+    
+    def _key(self, messages: Messages, system_prompt: Optional[str]) -> str:
+        return self.cache.make_key(
+            self.provider_name,
+            self.model_name,
+            system_prompt,
+            normalize_messages(messages),
+            self.temperature,
+            self.max_tokens,
+        )
+    
+    def _fuzzy(self, messages: Messages, system_prompt: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+        """Scope and text for near-duplicate matching: the last user message, in its conversation."""
+        normalized = normalize_messages(messages)
+        if not normalized or normalized[-1]["role"] != "user":
+            return None, None
+        scope = self.cache.make_scope(
+            self.provider_name,
+            self.model_name,
+            system_prompt,
+            self.temperature,
+            self.max_tokens,
+            normalized[:-1],
+        )
+        return scope, normalized[-1]["content"]
+    
+    def _get(self, key: str, messages: Messages, system_prompt: Optional[str]) -> Optional[str]:
+        if not self.cache.fuzzy_threshold:
+            return self.cache.get(key)
+        return self.cache.get(key, *self._fuzzy(messages, system_prompt))
+    
+    def _put(self, key: str, messages: Messages, system_prompt: Optional[str], response: str):
+        if not self.cache.fuzzy_threshold:
+            self.cache.put(key, response)
+        else:
+            self.cache.put(key, response, *self._fuzzy(messages, system_prompt))
+    
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        key = self._key(messages, system_prompt)
+        cached = self._lookup(key, messages, system_prompt)
+        if cached is not None:
+            return cached
+        response = self.wrapped.chat(messages, system_prompt)
+        self._put(key, messages, system_prompt, response)
+        return response
+    
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        key = self._key(messages, system_prompt)
+        cached = self._lookup(key, messages, system_prompt)
+        if cached is not None:
+            # Replays are not provider latency
+            set_current_stream_metrics(None)
+            yield from replay_chunks(cached)
+            return
+        
+        chunks = []
+        for chunk in self.wrapped.chat_stream(messages, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        # Only complete streams are stored
+        self._put(key, messages, system_prompt, "".join(chunks))
+    
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        key = self._key(messages, system_prompt)
+        cached = self._lookup(key, messages, system_prompt)
+        if cached is not None:
+            return cached
+        response = await self.wrapped.achat(messages, system_prompt)
+        self._put(key, messages, system_prompt, response)
+        return response
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        key = self._key(messages, system_prompt)
+        cached = self._lookup(key, messages, system_prompt)
+        if cached is not None:
+            set_current_stream_metrics(None)
+            for chunk in replay_chunks(cached):
+                yield chunk
+            return
+        
+        chunks = []
+        async for chunk in self.wrapped.achat_stream(messages, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        self._put(key, messages, system_prompt, "".join(chunks))
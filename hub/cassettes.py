@@ -0,0 +1,290 @@
+# hub/cassettes.py
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import AsyncGenerator, Dict, Generator, List, Optional
+
+from .clients import errors
+from .clients.base import BaseClient, Messages, normalize_messages
+from .clients.wrapper import ClientWrapper
+
+CASSETTE_VERSION = 1
+
+_record_dir: Optional[str] = None
+_library: Optional["ReplayLibrary"] = None
+_realtime = True
+
+
+def record_to(directory: str):
+    """Record every provider call made from now on into ``directory``."""
+    global _record_dir
+    os.makedirs(directory, exist_ok=True)
+    _record_dir = directory
+
+
+def replay_from(directory: str, realtime: bool = True):
+    """Serve provider calls from the cassettes in ``directory`` instead of the network."""
+    global _library, _realtime
+    _library = ReplayLibrary(directory)
+    _realtime = realtime
+
+
+def replaying() -> bool:
+    return _library is not None
+
+
+def wrap(client: BaseClient, model: str) -> BaseClient:
+    """``client`` wrapped in a recorder if recording is on."""
+    if _record_dir is None:
+        return client
+    return RecordingClient(client, _record_dir, model)
+
+
+def replay_client(model: str) -> BaseClient:
+    return ReplayClient(_library, model, _realtime)
+
+
+def request_key(model: str, messages: Messages, system_prompt: Optional[str]) -> str:
+    payload = json.dumps([model, normalize_messages(messages), system_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class RecordingClient(ClientWrapper):
+    """Saves each call's request, chunks and the delay before each chunk.
+    
+    One JSON file per call. ``chat`` is stored as a single chunk arriving
+    after the whole request, so both kinds replay through the same path.
+    Streams the consumer abandons are not saved.
+    """
+    
+    def __init__(self, wrapped: BaseClient, directory: str, model: str):
+        super().__init__(wrapped)
+        self.directory = directory
+        self.model = model
+        self._lock = threading.Lock()
+        self._count = 0
+    
+    def _save(self, mode: str, messages: Messages, system_prompt: Optional[str],
+              chunks: List[list], error: Optional[Exception] = None):
+        key = request_key(self.model, messages, system_prompt)
+        cassette = {
+            "version": CASSETTE_VERSION,
+            "key": key,
+            "model": self.model,
+            "provider": self.wrapped.provider_name,
+            "model_name": self.wrapped.model_name,
+            "max_tokens": self.wrapped.max_tokens,
+            "context_window": self.wrapped.context_window,
+            "mode": mode,
+            "recorded_at": time.time(),
+            "request": {"messages": normalize_messages(messages), "system_prompt": system_prompt},
+            "chunks": chunks,
+            "usage": self.wrapped.last_usage,
+            "error": {"type": type(error).__name__, "message": str(error)} if error is not None else None,
+        }
+        with self._lock:
+            self._count += 1
+            name = f"{key}-{time.time_ns()}-{self._count}.json"
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            json.dump(cassette, f, ensure_ascii=False)
+    
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        start = time.perf_counter()
+        try:
+            response = self.wrapped.chat(messages, system_prompt)
+        except Exception as e:
+            self._save("chat", messages, system_prompt, [], e)
+            raise
+        self._save("chat", messages, system_prompt, [[round(time.perf_counter() - start, 6), response]])
+        return response
+    
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        chunks: List[list] = []
+        last = time.perf_counter()
+        try:
+            for chunk in self.wrapped.chat_stream(messages, system_prompt):
+                chunks.append([round(time.perf_counter() - last, 6), chunk])
+                yield chunk
+                # Time the consumer spent on the chunk is not the provider's
+                last = time.perf_counter()
+        except Exception as e:
+            self._save("stream", messages, system_prompt, chunks, e)
+            raise
+        self._save("stream", messages, system_prompt, chunks)
+    
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        start = time.perf_counter()
+        try:
+            response = await self.wrapped.achat(messages, system_prompt)
+        except Exception as e:
+            self._save("chat", messages, system_prompt, [], e)
+            raise
+        self._save("chat", messages, system_prompt, [[round(time.perf_counter() - start, 6), response]])
+        return response
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        chunks: List[list] = []
+        last = time.perf_counter()
+        try:
+            async for chunk in self.wrapped.achat_stream(messages, system_prompt):
+                chunks.append([round(time.perf_counter() - last, 6), chunk])
+                yield chunk
+                # Time the consumer spent on the chunk is not the provider's
+                last = time.perf_counter()
+        except Exception as e:
+            self._save("stream", messages, system_prompt, chunks, e)
+            raise
+        self._save("stream", messages, system_prompt, chunks)
+
+
+class ReplayLibrary:
+    """The cassettes of a directory, indexed by request and by model.
+    
+    A request gets its own recordings in turn. A request that was never
+    recorded gets the recordings of the same model in turn, so one real
+    stream can be replayed under any prompt.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.by_key: Dict[str, List[dict]] = {}
+        self.by_model: Dict[str, List[dict]] = {}
+        self._next: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    cassette = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not isinstance(cassette, dict) or cassette.get("version") != CASSETTE_VERSION:
+                continue
+            self.by_key.setdefault(cassette["key"], []).append(cassette)
+            self.by_model.setdefault(cassette["model"], []).append(cassette)
+    
+    def __len__(self) -> int:
+        return sum(len(cassettes) for cassettes in self.by_key.values())
+    
+    def first(self, model: str) -> Optional[dict]:
+        cassettes = self.by_model.get(model)
+        return cassettes[0] if cassettes else None
+    
+    def next(self, model: str, messages: Messages, system_prompt: Optional[str]) -> dict:
+        key = request_key(model, messages, system_prompt)
+        if key in self.by_key:
+            pool_name, cassettes = key, self.by_key[key]
+        elif model in self.by_model:
+            pool_name, cassettes = model, self.by_model[model]
+        else:
+            raise errors.ProviderError(f"No recording for model {model} in {self.directory}", provider="replay")
+        with self._lock:
+            index = self._next.get(pool_name, 0)
+            self._next[pool_name] = index + 1
+        return cassettes[index % len(cassettes)]
+
+
+class ReplayClient(BaseClient):
+    """Serves recorded calls with no network, at the recorded pace or as fast as possible."""
+    
+    def __init__(self, library: ReplayLibrary, model: str, realtime: bool = True):
+        super().__init__("")
+        self.library = library
+        self.model = model
+        self.realtime = realtime
+        sample = library.first(model) or {}
+        self.provider_name = sample.get("provider", "replay")
+        self._model_name = sample.get("model_name", model)
+        self._max_tokens = sample.get("max_tokens", 4096)
+        self._context_window = sample.get("context_window", 8192)
+    
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+    
+    @property
+    def max_tokens(self) -> int:
+        return self._max_tokens
+    
+    @property
+    def context_window(self) -> int:
+        return self._context_window
+    
+    def _raise_recorded(self, cassette: dict):
+        error = cassette.get("error")
+        if error is None:
+            return
+        error_class = getattr(errors, error["type"], None)
+        if not (isinstance(error_class, type) and issubclass(error_class, errors.ProviderError)):
+            error_class = errors.ProviderError
+        raise error_class(error["message"], provider=self.provider_name)
+    
+    def _deadlines(self, cassette: dict):
+        # Deadlines from the start rather than per-chunk sleeps, so timer overshoot doesn't add up
+        offset = 0.0
+        for delay, chunk in cassette["chunks"]:
+            offset += delay
+            yield offset, chunk
+    
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        cassette = self.library.next(self.model, messages, system_prompt)
+        if self.realtime:
+            time.sleep(sum(delay for delay, _ in cassette["chunks"]))
+        self._raise_recorded(cassette)
+        self.last_usage = cassette.get("usage")
+        return "".join(chunk for _, chunk in cassette["chunks"])
+    
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        cassette = self.library.next(self.model, messages, system_prompt)
+        metrics = self._begin_stream_metrics()
+        start = time.perf_counter()
+        try:
+            for i, (offset, chunk) in enumerate(self._deadlines(cassette)):
+                if self.realtime:
+                    # Offsets exclude consumer time, so replay shifts by ours
+                    remaining = start + offset + metrics.consumer_time - time.perf_counter()
+                    if remaining > 0:
+                        time.sleep(remaining)
+                if i == 0:
+                    metrics.mark_connected()
+                metrics.record_chunk(chunk)
+                yield chunk
+                metrics.resume()
+            self._raise_recorded(cassette)
+            self.last_usage = cassette.get("usage")
+        finally:
+            metrics.finish(self.last_usage)
+    
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        import asyncio
+        cassette = self.library.next(self.model, messages, system_prompt)
+        if self.realtime:
+            await asyncio.sleep(sum(delay for delay, _ in cassette["chunks"]))
+        self._raise_recorded(cassette)
+        self.last_usage = cassette.get("usage")
+        return "".join(chunk for _, chunk in cassette["chunks"])
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        import asyncio
+        cassette = self.library.next(self.model, messages, system_prompt)
+        metrics = self._begin_stream_metrics()
+        start = time.perf_counter()
+        try:
+            for i, (offset, chunk) in enumerate(self._deadlines(cassette)):
+                if self.realtime:
+                    # Offsets exclude consumer time, so replay shifts by ours
+                    remaining = start + offset + metrics.consumer_time - time.perf_counter()
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+                if i == 0:
+                    metrics.mark_connected()
+                metrics.record_chunk(chunk)
+                yield chunk
+                metrics.resume()
+            self._raise_recorded(cassette)
+            self.last_usage = cassette.get("usage")
+        finally:
+            metrics.finish(self.last_usage)
@@ -1,15 +1,15 @@
 # hub/cli.py
 import argparse
+import json
 import sys
 import os
-from typing import Optional
+from typing import List, Optional
 
 from .config import Config
-from .interactive import InteractiveSession
-from .clients.grok import GrokClient
-from .clients.claude import ClaudeClient
-from .clients.gemini import GeminiClient
-from .clients.openai_client import OpenAIClient
+from .clients import http, registry
+from . import cassettes
+from .metrics import current_stream_metrics
+from . import tracing
 from .utils.formatting import print_response, print_error, print_info, print_bold
 from .utils.terminal import setup_terminal
 import getpass
@@ -24,9 +24,34 @@ def create_parser() -> argparse.ArgumentParser:
     
     parser.add_argument(
         "--model", "-m",
-        choices=["grok", "claude", "gemini", "gpt-4", "gpt-3.5-turbo", "gpt-4o"],
         default="grok",
-        help="Choose the AI model to use (default: grok)"
+        metavar="MODEL",
+        help="Choose the AI model to use: " + ", ".join(registry.MODELS) +
+             " or a plugin model (default: grok)"
+    )
+    
+    parser.add_argument(
+        "--failover",
+        metavar="MODELS",
+        help="Models to fall back to, in order, when the selected one keeps failing (e.g. claude,gpt-4o)"
+    )
+    
+    parser.add_argument(
+        "--race",
+        metavar="MODELS",
+        help="Send each prompt to several models (e.g. grok,claude,gpt-4o) and stream the first to answer"
+    )
+    
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="With --race, start the next model only if the previous one is slower than its p95 time to first token"
+    )
+    
+    parser.add_argument(
+        "--compare",
+        metavar="MODELS",
+        help="Stream the prompt from several models side by side (e.g. claude,gemini,gpt-4)"
     )
     
     parser.add_argument(
@@ -41,12 +66,120 @@ def create_parser() -> argparse.ArgumentParser:
         help="Start interactive mode"
     )
     
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION",
+        help="Continue a saved interactive session by id"
+    )
+    
+    parser.add_argument(
+        "--continue",
+        dest="continue_session",
+        action="store_true",
+        help="Continue the most recent interactive session"
+    )
+    
     parser.add_argument(
         "--setup",
         action="store_true",
         help="Setup API keys and configuration"
     )
     
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Run every prompt in a JSONL file ('-' for stdin) and write JSONL results"
+    )
+    
+    parser.add_argument(
+        "--output", "-o",
+        metavar="FILE",
+        help="Where to write batch results (default: stdout)"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum concurrent requests in batch mode (default: 8)"
+    )
+    
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Serve repeated requests from the local response cache"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the response cache even if enabled in config"
+    )
+    
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        metavar="SECONDS",
+        help="Maximum age of cached responses (default: 7 days)"
+    )
+    
+    parser.add_argument(
+        "--cache-similarity",
+        type=float,
+        metavar="THRESHOLD",
+        help="Also serve near-duplicate prompts with similarity >= THRESHOLD (0-1, e.g. 0.95)"
+    )
+    
+    parser.add_argument(
+        "--usage",
+        action="store_true",
+        help="Print token usage and cost after a one-shot response"
+    )
+    
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Stream the request and print latency metrics as a JSON line (one-shot and batch)"
+    )
+    
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="USD",
+        help="Refuse requests once this session would spend more than USD"
+    )
+    
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=os.environ.get("HUB_TRACE"),
+        help="Write request spans to FILE as a Chrome trace (also: HUB_TRACE)"
+    )
+    
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Save every provider call (request, chunks and their timing) to DIR"
+    )
+    
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Answer from the recordings in DIR instead of calling providers"
+    )
+    
+    parser.add_argument(
+        "--replay-fast",
+        action="store_true",
+        help="With --replay, send recorded chunks without their original delays"
+    )
+    
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Show import time per module for the selected model and exit"
+    )
+    
     parser.add_argument(
         "--version", "-v",
         action="version",
@@ -169,6 +302,13 @@ def has_any_api_key(config: Config) -> bool:
     return bool(config.grok_api_key or config.claude_api_key or config.openai_api_key or config.gemini_api_key)
 
 
+def needs_api_key(model: str) -> bool:
+    try:
+        return registry.resolve_model(model).needs_key
+    except ValueError:
+        return True
+
+
 def first_time_setup(config: Config) -> int:
     """Interactive first-time setup wizard"""
     print("╭───────────────────────────────────────────────────╮")
@@ -257,67 +397,266 @@ def first_time_setup(config: Config) -> int:
     return 0
 
 
+def open_cache(config: Config, args: argparse.Namespace):
+    """Return the response cache if enabled by flag or config, else None."""
+    if args.no_cache or not (args.cache or config.cache_enabled):
+        return None
+    
+    from .cache import ResponseCache
+    ttl = args.cache_ttl if args.cache_ttl is not None else config.cache_ttl
+    similarity = args.cache_similarity if args.cache_similarity is not None else config.cache_similarity
+    try:
+        return ResponseCache(
+            config.cache_path,
+            ttl=ttl,
+            max_bytes=config.cache_max_bytes,
+            fuzzy_threshold=similarity
+        )
+    except Exception as e:
+        print_error(f"Response cache disabled: {e}")
+        return None
+
+
+def create_provider_client(model: str, config: Config):
+    """Build the bare client for ``model``, importing only that provider's SDK."""
+    if cassettes.replaying():
+        return cassettes.replay_client(model)
+    
+    try:
+        spec = registry.resolve_model(model)
+    except ValueError:
+        print_error(f"Unsupported model: {model}")
+        return None
+    
+    api_key = config.get_api_key(spec.name) if spec.needs_key else ""
+    if spec.needs_key and not api_key:
+        print_error(f"{spec.label} API key not found. Please run 'hub --setup' to configure.")
+        return None
+    
+    try:
+        client = registry.create_client(model, api_key)
+    except ImportError as e:
+        print_error(f"{spec.label} support is not installed: {e}")
+        return None
+    client.temperature = config.temperature
+    if hasattr(client, "prompt_caching"):
+        client.prompt_caching = config.prompt_caching
+    if spec.name == "mock":
+        client.configure(config.mock)
+    
+    return cassettes.wrap(client, model)
+
+
+def build_client(model: str, config: Config, cache=None, failover: Optional[List[str]] = None):
+    """Build the client for ``model`` with retries, failover and the optional cache."""
+    client = create_provider_client(model, config)
+    if client is None:
+        return None
+    
+    from .resilience import ResilientClient, RetryPolicy
+    if failover is None:
+        failover = config.failover
+    client = ResilientClient(
+        client,
+        RetryPolicy(max_retries=config.max_retries),
+        failover=[fallback for fallback in failover if fallback != model],
+        client_factory=lambda fallback: create_provider_client(fallback, config)
+    )
+    
+    if cache is not None:
+        from .cache import CachedClient
+        client = CachedClient(client, cache)
+    
+    return client
+
+
+def build_race_client(models: str, config: Config, cache=None, hedge: bool = False):
+    """Build a RaceClient over the comma-separated ``models``."""
+    from .race import RaceClient, TTFTHistory
+    
+    clients = []
+    for model in models.split(","):
+        client = build_client(model.strip(), config, failover=[])
+        if client is None:
+            return None
+        clients.append(client)
+    
+    history = TTFTHistory(os.path.join(config.config_dir, "ttft.json"))
+    client = RaceClient(clients, hedge=hedge, history=history)
+    
+    if cache is not None:
+        from .cache import CachedClient
+        client = CachedClient(client, cache)
+    
+    return client
+
+
+def search_command(argv: List[str]) -> int:
+    """``hub search QUERY``: full-text search over saved sessions and exports."""
+    parser = argparse.ArgumentParser(prog="hub search", description="Search past conversations")
+    parser.add_argument("query", nargs="*", help="Words to find; end a word with * to match a prefix")
+    parser.add_argument("--add", nargs="+", metavar="FILE", help="Index conversations exported with /export")
+    parser.add_argument("--limit", "-n", type=int, default=10, help="Maximum number of results (default: 10)")
+    parser.add_argument("--config", "-c", type=str, help="Path to config file")
+    args = parser.parse_args(argv)
+    
+    import time
+    from .search import SearchIndex, print_results
+    
+    config = Config(args.config)
+    index = SearchIndex(config.search_index_path)
+    try:
+        for path in args.add or []:
+            try:
+                print_info(f"Indexed {index.index_export(path)} turns from {path}")
+            except (OSError, ValueError, KeyError) as e:
+                print_error(f"Cannot index {path}: {e}")
+        if not args.query:
+            if not args.add:
+                parser.print_usage()
+                return 1
+            return 0
+        
+        start = time.perf_counter()
+        index.sync_sessions(config.sessions_dir)
+        results = index.search(" ".join(args.query), args.limit)
+        print_results(results, time.perf_counter() - start)
+    finally:
+        index.close()
+    return 0
+
+
+def daemon_command(argv: List[str]) -> int:
+    """``hub daemon start|stop|status``: manage the resident process that serves one-shot prompts."""
+    parser = argparse.ArgumentParser(prog="hub daemon", description="Manage the hub daemon")
+    parser.add_argument("action", choices=["start", "stop", "status"])
+    parser.add_argument("--config", "-c", type=str, help="Path to config file")
+    args = parser.parse_args(argv)
+    
+    from . import daemon
+    if args.action == "start":
+        return daemon.start(args.config)
+    if args.action == "stop":
+        return daemon.stop(args.config)
+    return daemon.show_status(args.config)
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        return search_command(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "daemon":
+        return daemon_command(sys.argv[2:])
+    
     parser = create_parser()
     args = parser.parse_args()
     
+    if args.profile_startup:
+        from .utils.profiling import profile_startup
+        return profile_startup(args.model)
+    
+    if args.trace:
+        tracing.enable(args.trace)
+    
+    if args.record and args.replay:
+        print_error("--record and --replay cannot be used together")
+        return 1
+    if args.record:
+        cassettes.record_to(args.record)
+    if args.replay:
+        cassettes.replay_from(args.replay, realtime=not args.replay_fast)
+    
     # Load configuration
-    config = Config(args.config)
+    with tracing.span("config.load"):
+        config = Config(args.config)
+    http.configure(config.http)
     
     # Setup terminal
     setup_terminal()
     
     # Handle setup command
     if args.setup:
-        return setup_configuration(config)
+        # All answers are written in one atomic save
+        with config.batch():
+            return setup_configuration(config)
     
     # Check if this is first time (no API keys configured)
-    if not has_any_api_key(config):
-        result = first_time_setup(config)
+    if not has_any_api_key(config) and needs_api_key(args.model) and not args.replay:
+        with config.batch():
+            result = first_time_setup(config)
         if result != 0:
             return result
-        # Reload config after setup
-        config = Config(args.config)
-    
-    # If no arguments, start interactive mode by default
-    if not args.prompt and not args.interactive and not args.setup:
-        args.interactive = True
     
     # Use default model if not specified
     model = args.model if args.model != "grok" or config.grok_api_key else config.default_model
     
-    # Create client based on model choice
-    if model == "grok":
-        if not config.grok_api_key:
-            print_error("Grok API key not found. Please run 'hub --setup' to configure.")
-            return 1
-        client = GrokClient(config.grok_api_key)
-    elif model == "claude":
-        if not config.claude_api_key:
-            print_error("Claude API key not found. Please run 'hub --setup' to configure.")
-            return 1
-        client = ClaudeClient(config.claude_api_key)
-    elif model == "gemini":
-        if not config.gemini_api_key:
-            print_error("Gemini API key not found. Please run 'hub --setup' to configure.")
+    cache = open_cache(config, args)
+    
+    if args.batch:
+        from .batch import run_batch
+        return run_batch(
+            args.batch,
+            args.output,
+            lambda batch_model: build_client(batch_model, config, cache),
+            model,
+            concurrency=args.concurrency,
+            system_prompt=config.system_prompt,
+            metrics=args.metrics
+        )
+    
+    if args.compare:
+        if not args.prompt:
+            print_error("--compare needs a prompt")
             return 1
-        client = GeminiClient(config.gemini_api_key)
-    elif model in ["gpt-4", "gpt-3.5-turbo", "gpt-4o"]:
-        if not config.openai_api_key:
-            print_error("OpenAI API key not found. Please run 'hub --setup' to configure.")
+        from .compare import run_compare
+        return run_compare(
+            args.compare.split(","),
+            " ".join(args.prompt),
+            lambda compare_model: build_client(compare_model, config, failover=[]),
+            system_prompt=config.system_prompt
+        )
+    
+    session_log = None
+    if args.resume or args.continue_session:
+        from .sessions import SessionLog, list_sessions
+        session_id = args.resume
+        if session_id is None:
+            sessions = list_sessions(config.sessions_dir)
+            session_id = sessions[-1] if sessions else None
+        if session_id is None or not SessionLog.exists(config.sessions_dir, session_id):
+            print_error(f"Session not found: {session_id}" if session_id else "No saved sessions to continue")
             return 1
-        client = OpenAIClient(config.openai_api_key, model)
-    else:
-        print_error(f"Unsupported model: {model}")
+        session_log = SessionLog(config.sessions_dir, session_id)
+        args.interactive = True
+    
+    # If no arguments, start interactive mode by default
+    if not args.prompt and not args.interactive and not args.setup:
+        args.interactive = True
+    
+    with tracing.span("client.build", model=args.race or model):
+        if args.race:
+            client = build_race_client(args.race, config, cache, args.hedge)
+        else:
+            failover = args.failover.split(",") if args.failover else None
+            client = build_client(model, config, cache, failover)
+    if client is None:
         return 1
     
     # Handle interactive mode
     if args.interactive or not args.prompt:
-        session = InteractiveSession(client, config)
+        from .clients.pool import ClientPool
+        from .interactive import InteractiveSession
+        pool = ClientPool(
+            lambda pool_model: build_race_client(pool_model, config, cache, args.hedge) if "," in pool_model
+            else build_client(pool_model, config, cache)
+        )
+        pool.add(args.race or model, client)
+        session = InteractiveSession(client, config, budget=args.budget, pool=pool, session_log=session_log)
         try:
             session.run()
         except KeyboardInterrupt:
             print("\nGoodbye!")
+        finally:
+            session.close()
         return 0
     
     # Handle single prompt
@@ -326,11 +665,35 @@ def main():
         print_error("Please provide a prompt or use --interactive mode")
         return 1
     
+    from .usage import UsageTracker
+    usage = UsageTracker(config.prices, args.budget if args.budget is not None else config.budget_limit,
+                         config.expected_output_tokens)
+    
     try:
-        response = client.chat(prompt)
-        print_response(response)
+        with tracing.span("request", model=model):
+            usage.check_budget(client, prompt)
+            client.reset_usage()
+            if args.metrics:
+                response = "".join(client.chat_stream(prompt))
+            else:
+                response = client.chat(prompt)
+        with tracing.span("render"):
+            print_response(response)
     except Exception as e:
         print_error(f"Error: {e}")
         return 1
     
+    if args.metrics:
+        metrics = current_stream_metrics()
+        if metrics is not None:
+            print(json.dumps(metrics.as_dict()), file=sys.stderr)
+    
+    race = getattr(client, "last_race", None)
+    if race is not None and current_stream_metrics() is not None:
+        print(json.dumps({"race": race}), file=sys.stderr)
+    
+    if args.usage:
+        turn = usage.record(client, prompt, None, response)
+        print(usage.format_turn(turn), file=sys.stderr)
+    
     return 0
\ No newline at end of file
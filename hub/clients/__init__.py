@@ -1,7 +1,26 @@
 # hub/clients/__init__.py
-from .grok import GrokClient
-from .claude import ClaudeClient
-from .gemini import GeminiClient
-from .openai_client import OpenAIClient
+import importlib
 
-__all__ = ["GrokClient", "ClaudeClient", "GeminiClient", "OpenAIClient"]
\ No newline at end of file
+from .registry import available_models, create_client, register_provider, resolve_model
+
+# Provider classes are imported on first access so that importing
+# hub.clients does not pull in every SDK.
+_LAZY_CLIENTS = {
+    "GrokClient": ".grok",
+    "ClaudeClient": ".claude",
+    "GeminiClient": ".gemini",
+    "OpenAIClient": ".openai_client",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_CLIENTS:
+        module = importlib.import_module(_LAZY_CLIENTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "GrokClient", "ClaudeClient", "GeminiClient", "OpenAIClient",
+    "available_models", "create_client", "register_provider", "resolve_model",
+]
@@ -1,20 +1,161 @@
 # grok4_cli/clients/base.py
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, List, AsyncGenerator, Callable, Iterable, Union
+
+from ..metrics import StreamMetrics, current_stream_metrics, set_current_stream_metrics
+
+# Usage of the request made last in the current thread / asyncio task, so
+# concurrent requests on one client each see their own numbers.
+_current_usage: ContextVar = ContextVar("hub_usage", default=None)
+
+# A single user prompt, or a conversation as [{"role": ..., "content": ...}]
+# with roles "user" and "assistant".
+Messages = Union[str, List[Dict[str, str]]]
+
+
+def normalize_messages(messages: Messages) -> List[Dict[str, str]]:
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+    return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+
+def usage_dict(input_tokens: Optional[int] = 0, output_tokens: Optional[int] = 0,
+               cache_read_tokens: Optional[int] = 0, cache_write_tokens: Optional[int] = 0) -> Dict[str, int]:
+    """Provider-neutral token usage; SDKs report missing fields as None."""
+    return {
+        "input_tokens": input_tokens or 0,
+        "output_tokens": output_tokens or 0,
+        "cache_read_tokens": cache_read_tokens or 0,
+        "cache_write_tokens": cache_write_tokens or 0,
+    }
+
+
+def current_usage() -> Optional[Dict[str, int]]:
+    """``last_usage`` of the request made last in this thread, whichever client made it."""
+    return _current_usage.get()
+
+
+def set_current_usage(usage: Optional[Dict[str, int]]):
+    _current_usage.set(usage)
+
+
+async def iterate_in_thread(make_iter: Callable[[], Iterable[Any]]) -> AsyncGenerator[Any, None]:
+    """Drive a blocking iterator from a worker thread and yield its items.
+    
+    Used as the async fallback for providers without a native async SDK.
+    If the consumer stops early the worker closes the blocking iterator
+    after its current item, which releases the underlying connection.
+    """
+    # Imported here so sync one-shot calls never pay for asyncio
+    import asyncio
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+    
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed
+            stop.set()
+    
+    def produce():
+        iterator = iter(make_iter())
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                put((item, None))
+        except BaseException as e:
+            put((done, e))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put((done, None))
+    
+    worker = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        stop.set()
+        if worker.done():
+            await worker
 
 
 class BaseClient(ABC):
+    provider_name = "unknown"
+    temperature = 0.7
+    _last_usage: Optional[Dict[str, int]] = None
+    # StreamMetrics of the most recent streamed response
+    last_stream_metrics: Optional[StreamMetrics] = None
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
     
+    @property
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """usage_dict() of the most recent request, when the provider reports it.
+        
+        Shared by every thread using the client; concurrent callers read
+        ``current_usage()`` instead.
+        """
+        return self._last_usage
+    
+    @last_usage.setter
+    def last_usage(self, usage: Optional[Dict[str, int]]):
+        self._last_usage = usage
+        set_current_usage(usage)
+    
+    def reset_usage(self):
+        """Forget the previous request's usage, so a missing report is detectable."""
+        self.last_usage = None
+    
+    def _begin_stream_metrics(self) -> StreamMetrics:
+        # A stream that fails early must not report the previous request's usage
+        self.last_usage = None
+        self.last_stream_metrics = StreamMetrics(self.provider_name, self.model_name)
+        set_current_stream_metrics(self.last_stream_metrics)
+        return self.last_stream_metrics
+    
     @abstractmethod
-    def chat(self, message: str, system_prompt: Optional[str] = None) -> str:
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
         pass
     
     @abstractmethod
-    def chat_stream(self, message: str, system_prompt: Optional[str] = None):
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None):
         pass
     
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        # Sync-to-async adapter; providers with an async SDK override this
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.chat, messages, system_prompt)
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        worker_metrics = []
+        
+        def stream():
+            yield from self.chat_stream(messages, system_prompt)
+            # Runs in the worker thread, whose context holds this stream's metrics
+            worker_metrics.append(current_stream_metrics())
+        
+        async for chunk in iterate_in_thread(stream):
+            yield chunk
+        if worker_metrics:
+            set_current_stream_metrics(worker_metrics[0])
+    
     @property
     @abstractmethod
     def model_name(self) -> str:
@@ -23,4 +164,9 @@ class BaseClient(ABC):
     @property
     @abstractmethod
     def max_tokens(self) -> int:
-        pass
\ No newline at end of file
+        pass
+    
+    @property
+    def context_window(self) -> int:
+        """Total tokens (input + output) the model accepts per request."""
+        return 8192
@@ -1,13 +1,20 @@
 # grok4_cli/clients/claude.py
 import anthropic
-from typing import Optional, Generator
-from .base import BaseClient
+from typing import Optional, Generator, AsyncGenerator
+from .base import BaseClient, Messages, normalize_messages, usage_dict
+from .errors import translate_error
+from .http import get_async_http_client, get_http_client
+from ..tracing import traced
 
 
 class ClaudeClient(BaseClient):
+    provider_name = "claude"
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=get_http_client(), max_retries=0)
+        self._async_client = None
+        self.prompt_caching = True
     
     @property
     def model_name(self) -> str:
@@ -17,34 +24,117 @@ class ClaudeClient(BaseClient):
     def max_tokens(self) -> int:
         return 8192
     
-    def chat(self, message: str, system_prompt: Optional[str] = None) -> str:
+    @property
+    def context_window(self) -> int:
+        return 200000
+    
+    @property
+    def async_client(self) -> anthropic.AsyncAnthropic:
+        # Only built when the async API is used
+        if self._async_client is None:
+            self._async_client = anthropic.AsyncAnthropic(
+                api_key=self.api_key, http_client=get_async_http_client(), max_retries=0
+            )
+        return self._async_client
+    
+    def _build_system(self, system_prompt: Optional[str] = None):
+        system = system_prompt or "You are a helpful AI assistant."
+        if not self.prompt_caching:
+            return system
+        return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+    
+    def _build_messages(self, messages: Messages) -> list:
+        messages = normalize_messages(messages)
+        if self.prompt_caching and len(messages) > 1:
+            # Breakpoint on the last history turn: everything up to it is
+            # identical on the next request and is read back from the cache
+            prefix_end = messages[-2]
+            prefix_end["content"] = [
+                {"type": "text", "text": prefix_end["content"], "cache_control": {"type": "ephemeral"}}
+            ]
+        return messages
+    
+    def _record_usage(self, usage):
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        # Anthropic reports cached tokens separately from input_tokens
+        self.last_usage = usage_dict(
+            (usage.input_tokens or 0) + cache_read + cache_write,
+            usage.output_tokens,
+            cache_read,
+            cache_write,
+        )
+    
+    @traced("chat")
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
         try:
             response = self.client.messages.create(
                 model=self.model_name,
                 max_tokens=self.max_tokens,
-                system=system_prompt or "You are a helpful AI assistant.",
-                messages=[
-                    {"role": "user", "content": message}
-                ]
+                system=self._build_system(system_prompt),
+                messages=self._build_messages(messages)
             )
             
+            self._record_usage(response.usage)
             return response.content[0].text
         
         except Exception as e:
-            raise Exception(f"Claude API error: {str(e)}")
+            raise translate_error(e, "Claude")
     
-    def chat_stream(self, message: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        metrics = self._begin_stream_metrics()
         try:
             with self.client.messages.stream(
                 model=self.model_name,
                 max_tokens=self.max_tokens,
-                system=system_prompt or "You are a helpful AI assistant.",
-                messages=[
-                    {"role": "user", "content": message}
-                ]
+                system=self._build_system(system_prompt),
+                messages=self._build_messages(messages)
             ) as stream:
+                metrics.mark_connected()
                 for text in stream.text_stream:
+                    metrics.record_chunk(text)
+                    yield text
+                    metrics.resume()
+                self._record_usage(stream.get_final_message().usage)
+        
+        except Exception as e:
+            raise translate_error(e, "Claude")
+        finally:
+            metrics.finish(self.last_usage)
+    
+    @traced("chat")
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        try:
+            response = await self.async_client.messages.create(
+                model=self.model_name,
+                max_tokens=self.max_tokens,
+                system=self._build_system(system_prompt),
+                messages=self._build_messages(messages)
+            )
+            
+            self._record_usage(response.usage)
+            return response.content[0].text
+        
+        except Exception as e:
+            raise translate_error(e, "Claude")
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        metrics = self._begin_stream_metrics()
+        try:
+            async with self.async_client.messages.stream(
+                model=self.model_name,
+                max_tokens=self.max_tokens,
+                system=self._build_system(system_prompt),
+                messages=self._build_messages(messages)
+            ) as stream:
+                metrics.mark_connected()
+                async for text in stream.text_stream:
+                    metrics.record_chunk(text)
                     yield text
+                    metrics.resume()
+                self._record_usage((await stream.get_final_message()).usage)
         
         except Exception as e:
-            raise Exception(f"Claude API error: {str(e)}")
\ No newline at end of file
+            raise translate_error(e, "Claude")
+        finally:
+            metrics.finish(self.last_usage)
\ No newline at end of file
@@ -0,0 +1,108 @@
+# hub/clients/errors.py
+import socket
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class ProviderError(Exception):
+    """A failed provider request. ``retryable`` errors may succeed if sent again."""
+    retryable = False
+    
+    def __init__(self, message: str, provider: Optional[str] = None, status: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitError(ProviderError):
+    retryable = True
+
+
+class OverloadedError(ProviderError):
+    retryable = True
+
+
+class ProviderTimeoutError(ProviderError):
+    retryable = True
+
+
+class ProviderConnectionError(ProviderError):
+    retryable = True
+
+
+class AuthenticationError(ProviderError):
+    pass
+
+
+class CircuitOpenError(ProviderError):
+    """The provider failed repeatedly and is not being called for now."""
+    retryable = True
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _status_of(error: Exception) -> Optional[int]:
+    # openai / anthropic: status_code; google.api_core: code
+    for attr in ("status_code", "code"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def _retry_after_of(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    return parse_retry_after(headers.get("retry-after"))
+
+
+def translate_error(error: Exception, label: str) -> ProviderError:
+    """Map an SDK exception to a typed ProviderError with the usable retry hints.
+    
+    SDK exception classes are matched by name and attributes so the SDKs do
+    not have to be imported here.
+    """
+    if isinstance(error, ProviderError):
+        return error
+    
+    message = f"{label} API error: {str(error)}"
+    provider = label.lower()
+    status = _status_of(error)
+    name = type(error).__name__
+    
+    if status == 429 or name in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+        error_class = RateLimitError
+    elif status in (401, 403) or name in ("AuthenticationError", "PermissionDeniedError", "Unauthenticated", "PermissionDenied"):
+        error_class = AuthenticationError
+    elif "Timeout" in name or name == "DeadlineExceeded" or status in (408, 504):
+        error_class = ProviderTimeoutError
+    elif status is not None and (status >= 500 or status == 529):
+        error_class = OverloadedError
+    elif "Connection" in name or isinstance(error, (ConnectionError, socket.gaierror, socket.herror)):
+        error_class = ProviderConnectionError
+    else:
+        error_class = ProviderError
+    
+    return error_class(message, provider=provider, status=status, retry_after=_retry_after_of(error))
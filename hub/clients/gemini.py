@@ -1,10 +1,14 @@
 # aic/clients/gemini.py
 import google.generativeai as genai
-from typing import Optional, Generator
-from .base import BaseClient
+from typing import Optional, Generator, AsyncGenerator
+from .base import BaseClient, Messages, normalize_messages, usage_dict
+from .errors import translate_error
+from ..tracing import traced
 
 
 class GeminiClient(BaseClient):
+    provider_name = "gemini"
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
         genai.configure(api_key=api_key)
@@ -18,31 +22,94 @@ class GeminiClient(BaseClient):
     def max_tokens(self) -> int:
         return 8192
     
-    def chat(self, message: str, system_prompt: Optional[str] = None) -> str:
-        try:
+    @property
+    def context_window(self) -> int:
+        return 32760
+    
+    def _build_prompt(self, messages: Messages, system_prompt: Optional[str] = None):
+        messages = normalize_messages(messages)
+        if len(messages) == 1:
+            message = messages[0]["content"]
             if system_prompt:
-                full_prompt = f"{system_prompt}\n\nUser: {message}"
-            else:
-                full_prompt = message
-            
+                return f"{system_prompt}\n\nUser: {message}"
+            return message
+        
+        # Multi-turn: Gemini calls the assistant role "model" and has no
+        # system role, so the system prompt leads the first user turn
+        contents = []
+        for i, m in enumerate(messages):
+            text = m["content"]
+            if i == 0 and system_prompt:
+                text = f"{system_prompt}\n\nUser: {text}"
+            contents.append({"role": "model" if m["role"] == "assistant" else "user", "parts": [text]})
+        return contents
+    
+    def _record_usage(self, response):
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is None:
+            return
+        self.last_usage = usage_dict(
+            getattr(metadata, "prompt_token_count", 0),
+            getattr(metadata, "candidates_token_count", 0),
+            getattr(metadata, "cached_content_token_count", 0),
+        )
+    
+    @traced("chat")
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        try:
+            full_prompt = self._build_prompt(messages, system_prompt)
             response = self.client.generate_content(full_prompt)
+            self._record_usage(response)
             return response.text
         
         except Exception as e:
-            raise Exception(f"Gemini API error: {str(e)}")
+            raise translate_error(e, "Gemini")
     
-    def chat_stream(self, message: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        metrics = self._begin_stream_metrics()
         try:
-            if system_prompt:
-                full_prompt = f"{system_prompt}\n\nUser: {message}"
-            else:
-                full_prompt = message
-            
+            full_prompt = self._build_prompt(messages, system_prompt)
             response = self.client.generate_content(full_prompt, stream=True)
+            metrics.mark_connected()
             
             for chunk in response:
                 if chunk.text:
+                    metrics.record_chunk(chunk.text)
+                    yield chunk.text
+                    metrics.resume()
+                self._record_usage(chunk)
+        
+        except Exception as e:
+            raise translate_error(e, "Gemini")
+        finally:
+            metrics.finish(self.last_usage)
+    
+    @traced("chat")
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        try:
+            full_prompt = self._build_prompt(messages, system_prompt)
+            response = await self.client.generate_content_async(full_prompt)
+            self._record_usage(response)
+            return response.text
+        
+        except Exception as e:
+            raise translate_error(e, "Gemini")
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        metrics = self._begin_stream_metrics()
+        try:
+            full_prompt = self._build_prompt(messages, system_prompt)
+            response = await self.client.generate_content_async(full_prompt, stream=True)
+            metrics.mark_connected()
+            
+            async for chunk in response:
+                if chunk.text:
+                    metrics.record_chunk(chunk.text)
                     yield chunk.text
+                    metrics.resume()
+                self._record_usage(chunk)
         
         except Exception as e:
-            raise Exception(f"Gemini API error: {str(e)}")
\ No newline at end of file
+            raise translate_error(e, "Gemini")
+        finally:
+            metrics.finish(self.last_usage)
\ No newline at end of file
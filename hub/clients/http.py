@@ -0,0 +1,205 @@
+# hub/clients/http.py
+import importlib.util
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+# Overridden by the ``http:`` section of config.yaml
+HTTP_DEFAULTS: Dict[str, Any] = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60.0,
+    "connect_timeout": 10.0,
+    "timeout": 600.0,
+    "http2": True,
+}
+
+# Stop pre-warming after this many seconds without a request
+MAX_WARM_IDLE = 600.0
+
+_settings: Dict[str, Any] = dict(HTTP_DEFAULTS)
+_lock = threading.Lock()
+_sync_client = None
+# httpx.AsyncClient connections belong to the event loop that opened them
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def configure(settings: Optional[Dict[str, Any]] = None):
+    """Set pool limits before the first client is created."""
+    _settings.clear()
+    _settings.update(HTTP_DEFAULTS)
+    if settings:
+        _settings.update({key: value for key, value in settings.items() if key in HTTP_DEFAULTS})
+
+
+def http2_enabled() -> bool:
+    # httpx only speaks HTTP/2 with the optional h2 package
+    return bool(_settings["http2"]) and importlib.util.find_spec("h2") is not None
+
+
+def _client_options(httpx) -> Dict[str, Any]:
+    return {
+        "limits": httpx.Limits(
+            max_connections=_settings["max_connections"],
+            max_keepalive_connections=_settings["max_keepalive_connections"],
+            keepalive_expiry=_settings["keepalive_expiry"],
+        ),
+        "timeout": httpx.Timeout(_settings["timeout"], connect=_settings["connect_timeout"]),
+        "http2": http2_enabled(),
+    }
+
+
+def get_http_client():
+    """The process-wide ``httpx.Client`` shared by the SDK-based providers.
+    
+    Returns None when httpx is not installed, in which case each SDK falls
+    back to its own connection handling.
+    """
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            try:
+                import httpx
+            except ImportError:
+                return None
+            _sync_client = httpx.Client(**_client_options(httpx))
+        return _sync_client
+
+
+def get_async_http_client():
+    """The shared ``httpx.AsyncClient`` for the running event loop."""
+    try:
+        import httpx
+    except ImportError:
+        return None
+    import asyncio
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**_client_options(httpx))
+            _async_clients[loop] = client
+        return client
+
+
+def pool_status() -> Dict[str, Any]:
+    return {
+        "created": _sync_client is not None,
+        "http2": http2_enabled(),
+        "max_connections": _settings["max_connections"],
+        "keepalive_expiry": _settings["keepalive_expiry"],
+    }
+
+
+def close():
+    global _sync_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+
+def endpoint_of(client) -> Optional[str]:
+    """Base URL of the SDK behind ``client``, if it talks HTTP through the shared pool."""
+    if hasattr(client, "unwrap"):
+        client = client.unwrap()
+    base_url = getattr(getattr(client, "client", None), "base_url", None)
+    return str(base_url) if base_url else None
+
+
+class ConnectionWarmer:
+    """Keeps a pooled connection to the active provider open while the user types.
+    
+    While idle, a background thread sends a HEAD request to the provider's
+    endpoint, which leaves a TLS connection in the shared pool, and repeats it
+    before ``keepalive_expiry`` would close it. The next real request then
+    starts without DNS, TCP or TLS setup.
+    """
+    
+    def __init__(self):
+        self.url: Optional[str] = None
+        self.warmed_at: Optional[float] = None
+        self.ping_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.warm_starts = 0
+        self.cold_starts = 0
+        self._idle = False
+        self._idle_since = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def refresh_interval(self) -> float:
+        return max(float(_settings["keepalive_expiry"]) * 0.5, 1.0)
+    
+    def set_target(self, client):
+        url = endpoint_of(client)
+        if url != self.url:
+            self.url = url
+            self.warmed_at = None
+    
+    def is_warm(self) -> bool:
+        return self.warmed_at is not None and time.monotonic() - self.warmed_at < float(_settings["keepalive_expiry"])
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="hub-warmer", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def idle(self):
+        """The user is typing: keep the connection warm until ``busy``."""
+        self._idle = True
+        self._idle_since = time.monotonic()
+        self._wake.set()
+    
+    def busy(self) -> bool:
+        """A request is about to be sent; returns whether it starts warm."""
+        self._idle = False
+        warm = self.is_warm()
+        if warm:
+            self.warm_starts += 1
+        else:
+            self.cold_starts += 1
+        return warm
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if self._idle and time.monotonic() - self._idle_since < MAX_WARM_IDLE:
+                self.warm()
+    
+    def warm(self):
+        http_client = get_http_client()
+        url = self.url
+        if http_client is None or url is None:
+            return
+        start = time.perf_counter()
+        try:
+            # Any status will do; the connection is what we want
+            http_client.head(url)
+        except Exception as e:
+            self.error = str(e)
+            self.warmed_at = None
+            return
+        self.error = None
+        self.ping_ms = (time.perf_counter() - start) * 1000
+        self.warmed_at = time.monotonic()
+    
+    def status(self) -> str:
+        if self.url is None:
+            return "not available for this provider"
+        if self.error is not None:
+            return f"cold ({self.error})"
+        if not self.is_warm():
+            return "cold"
+        age = time.monotonic() - self.warmed_at
+        return f"warm (refreshed {age:.0f}s ago, last ping {self.ping_ms:.0f} ms)"
@@ -0,0 +1,140 @@
+# hub/clients/mock.py
+import random
+import time
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
+
+from .base import BaseClient, Messages, normalize_messages, usage_dict
+from .errors import OverloadedError
+from ..tracing import traced
+from ..utils.tokens import estimate_messages_tokens, estimate_tokens
+
+# Overridden by the ``mock:`` section of config.yaml
+MOCK_DEFAULTS: Dict[str, Any] = {
+    "ttft": 0.2,            # seconds before the first chunk
+    "chunk_chars": 4,       # characters per chunk, about one token
+    "chunk_delay": 0.01,    # seconds between chunks
+    "error_rate": 0.0,      # probability that a request fails with a retryable error
+    "response_chars": 2000, # length of every response
+    "seed": None,           # fixes the error sequence
+}
+
+_PARAGRAPH = (
+    "The quick brown fox jumps over the lazy dog while the **mock provider** streams "
+    "a reply with `inline code`, lists and fenced blocks so every part of the renderer "
+    "is exercised.\n\n"
+    "## Details\n\n"
+    "- first point about latency\n"
+    "- second point about throughput\n"
+    "1. numbered step\n\n"
+    "```python\n"
+    "def handler(request):\n"
+    "    return request.upper()\n"
+    "```\n\n"
+)
+
+
+@lru_cache(maxsize=16)
+def mock_text(length: int) -> str:
+    """Deterministic Markdown of exactly ``length`` characters."""
+    repeats = length // len(_PARAGRAPH) + 1
+    return (_PARAGRAPH * repeats)[:length]
+
+
+class MockClient(BaseClient):
+    """Offline provider with configurable latency, chunking and failures.
+    
+    Used to measure hub's own overhead without network or API credits:
+    ``hub -m mock "prompt"``. Timing and sizes come from ``MOCK_DEFAULTS``
+    updated by ``configure``.
+    """
+    provider_name = "mock"
+    
+    def __init__(self, api_key: str = ""):
+        super().__init__(api_key)
+        self.settings: Dict[str, Any] = dict(MOCK_DEFAULTS)
+        self._random = random.Random(self.settings["seed"])
+        self.requests = 0
+    
+    def configure(self, settings: Optional[Dict[str, Any]] = None, **overrides):
+        self.settings.update({key: value for key, value in (settings or {}).items() if key in MOCK_DEFAULTS})
+        self.settings.update({key: value for key, value in overrides.items() if key in MOCK_DEFAULTS})
+        self._random = random.Random(self.settings["seed"])
+    
+    @property
+    def model_name(self) -> str:
+        return "mock"
+    
+    @property
+    def max_tokens(self) -> int:
+        return 4096
+    
+    @property
+    def context_window(self) -> int:
+        return 128000
+    
+    def _chunks(self) -> List[str]:
+        text = mock_text(int(self.settings["response_chars"]))
+        size = max(int(self.settings["chunk_chars"]), 1)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    
+    def _begin_request(self):
+        self.requests += 1
+        if self._random.random() < self.settings["error_rate"]:
+            raise OverloadedError("Mock API error: simulated overload", provider="mock", status=529)
+    
+    def _record_usage(self, messages: Messages, system_prompt: Optional[str]):
+        input_tokens = estimate_messages_tokens(normalize_messages(messages)) + estimate_tokens(system_prompt)
+        self.last_usage = usage_dict(input_tokens, estimate_tokens(mock_text(int(self.settings["response_chars"]))))
+    
+    @traced("chat")
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        chunks = self._chunks()
+        time.sleep(self.settings["ttft"] + self.settings["chunk_delay"] * max(len(chunks) - 1, 0))
+        self._begin_request()
+        self._record_usage(messages, system_prompt)
+        return "".join(chunks)
+    
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        metrics = self._begin_stream_metrics()
+        delay = self.settings["chunk_delay"]
+        try:
+            time.sleep(self.settings["ttft"])
+            self._begin_request()
+            metrics.mark_connected()
+            for i, chunk in enumerate(self._chunks()):
+                if i and delay:
+                    time.sleep(delay)
+                metrics.record_chunk(chunk)
+                yield chunk
+                metrics.resume()
+            self._record_usage(messages, system_prompt)
+        finally:
+            metrics.finish(self.last_usage)
+    
+    @traced("chat")
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        import asyncio
+        chunks = self._chunks()
+        await asyncio.sleep(self.settings["ttft"] + self.settings["chunk_delay"] * max(len(chunks) - 1, 0))
+        self._begin_request()
+        self._record_usage(messages, system_prompt)
+        return "".join(chunks)
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        import asyncio
+        metrics = self._begin_stream_metrics()
+        delay = self.settings["chunk_delay"]
+        try:
+            await asyncio.sleep(self.settings["ttft"])
+            self._begin_request()
+            metrics.mark_connected()
+            for i, chunk in enumerate(self._chunks()):
+                if i and delay:
+                    await asyncio.sleep(delay)
+                metrics.record_chunk(chunk)
+                yield chunk
+                metrics.resume()
+            self._record_usage(messages, system_prompt)
+        finally:
+            metrics.finish(self.last_usage)
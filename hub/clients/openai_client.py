@@ -1,14 +1,27 @@
 # aic/clients/openai_client.py
 import openai
-from typing import Optional, Generator
-from .base import BaseClient
+from typing import Optional, Generator, AsyncGenerator
+from .base import BaseClient, Messages, normalize_messages, usage_dict
+from .errors import translate_error
+from .http import get_async_http_client, get_http_client
+from ..tracing import traced
+
+
+CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4o": 128000,
+    "gpt-3.5-turbo": 16385,
+}
 
 
 class OpenAIClient(BaseClient):
+    provider_name = "openai"
+    
     def __init__(self, api_key: str, model: str = "gpt-4"):
         super().__init__(api_key)
-        self.client = openai.OpenAI(api_key=api_key)
+        self.client = openai.OpenAI(api_key=api_key, http_client=get_http_client(), max_retries=0)
         self._model = model
+        self._async_client = None
     
     @property
     def model_name(self) -> str:
@@ -18,47 +31,127 @@ class OpenAIClient(BaseClient):
     def max_tokens(self) -> int:
         return 8192
     
-    def chat(self, message: str, system_prompt: Optional[str] = None) -> str:
-        messages = []
+    @property
+    def context_window(self) -> int:
+        return CONTEXT_WINDOWS.get(self._model, 8192)
+    
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        # Only built when the async API is used
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key, http_client=get_async_http_client(), max_retries=0
+            )
+        return self._async_client
+    
+    def _build_messages(self, messages: Messages, system_prompt: Optional[str] = None) -> list:
+        # Prefix caching is automatic here; keeping the system prompt first
+        # and history in order makes repeated prefixes byte-identical
+        built = []
         
         if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
+            built.append({"role": "system", "content": system_prompt})
         
-        messages.append({"role": "user", "content": message})
+        built.extend(normalize_messages(messages))
+        return built
+    
+    def _record_usage(self, usage):
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.last_usage = usage_dict(
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            getattr(details, "cached_tokens", 0),
+        )
+    
+    @traced("chat")
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        request_messages = self._build_messages(messages, system_prompt)
         
         try:
             response = self.client.chat.completions.create(
                 model=self.model_name,
-                messages=messages,
+                messages=request_messages,
                 max_tokens=self.max_tokens,
-                temperature=0.7
+                temperature=self.temperature
             )
             
+            self._record_usage(response.usage)
             return response.choices[0].message.content
         
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
+            raise translate_error(e, "OpenAI")
     
-    def chat_stream(self, message: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
-        messages = []
-        
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        
-        messages.append({"role": "user", "content": message})
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        request_messages = self._build_messages(messages, system_prompt)
+        metrics = self._begin_stream_metrics()
         
         try:
             stream = self.client.chat.completions.create(
                 model=self.model_name,
-                messages=messages,
+                messages=request_messages,
                 max_tokens=self.max_tokens,
-                temperature=0.7,
-                stream=True
+                temperature=self.temperature,
+                stream=True,
+                stream_options={"include_usage": True}
             )
+            metrics.mark_connected()
             
             for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    metrics.record_chunk(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+                    metrics.resume()
+                if chunk.usage:
+                    # Only the final chunk carries usage
+                    self._record_usage(chunk.usage)
+        
+        except Exception as e:
+            raise translate_error(e, "OpenAI")
+        finally:
+            metrics.finish(self.last_usage)
+    
+    @traced("chat")
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        request_messages = self._build_messages(messages, system_prompt)
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=request_messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            )
+            
+            self._record_usage(response.usage)
+            return response.choices[0].message.content
+        
+        except Exception as e:
+            raise translate_error(e, "OpenAI")
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        request_messages = self._build_messages(messages, system_prompt)
+        metrics = self._begin_stream_metrics()
+        
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=request_messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            metrics.mark_connected()
+            
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    metrics.record_chunk(chunk.choices[0].delta.content)
                     yield chunk.choices[0].delta.content
+                    metrics.resume()
+                if chunk.usage:
+                    self._record_usage(chunk.usage)
         
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
\ No newline at end of file
+            raise translate_error(e, "OpenAI")
+        finally:
+            metrics.finish(self.last_usage)
\ No newline at end of file
@@ -0,0 +1,49 @@
+# hub/clients/pool.py
+from typing import Callable, Dict, List, Optional
+
+from .base import BaseClient
+
+
+class ClientPool:
+    """Clients built so far in this process, by the model name they were requested as.
+    
+    Switching back to a model reuses its client, so the SDK is not constructed
+    again and its keep-alive connections in the shared HTTP pool stay warm.
+    """
+    
+    def __init__(self, factory: Callable[[str], Optional[BaseClient]]):
+        self.factory = factory
+        self._clients: Dict[str, BaseClient] = {}
+        self._spares: Dict[str, BaseClient] = {}
+    
+    def __contains__(self, model: str) -> bool:
+        return model in self._clients
+    
+    def add(self, model: str, client: BaseClient):
+        self._clients[model] = client
+    
+    def get(self, model: str) -> Optional[BaseClient]:
+        client = self._clients.get(model)
+        if client is None:
+            client = self.factory(model)
+            if client is not None:
+                self._clients[model] = client
+        return client
+    
+    def models(self) -> List[str]:
+        return list(self._clients)
+    
+    def spare(self, client: BaseClient) -> Optional[BaseClient]:
+        """A second client for the model ``client`` serves, for work running alongside it.
+        
+        Built once per model; None if ``client`` is not in the pool.
+        """
+        model = next((name for name, pooled in self._clients.items() if pooled is client), None)
+        if model is None:
+            return None
+        spare = self._spares.get(model)
+        if spare is None:
+            spare = self.factory(model)
+            if spare is not None:
+                self._spares[model] = spare
+        return spare
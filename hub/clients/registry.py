@@ -0,0 +1,118 @@
+# hub/clients/registry.py
+import importlib
+from typing import Dict, List, Optional, Type
+
+from .base import BaseClient
+
+ENTRY_POINT_GROUP = "hub.providers"
+
+
+class ProviderSpec:
+    """Describes a provider without importing its SDK.
+    
+    ``target`` is a ``"module:Class"`` string; the module is only imported
+    the first time a client for this provider is actually created.
+    """
+    
+    def __init__(self, name: str, target: str, label: Optional[str] = None, takes_model: bool = False,
+                 needs_key: bool = True):
+        self.name = name
+        self.target = target
+        self.label = label or name.capitalize()
+        self.takes_model = takes_model
+        self.needs_key = needs_key
+        self._cls: Optional[Type[BaseClient]] = None
+    
+    def load(self) -> Type[BaseClient]:
+        if self._cls is None:
+            module_name, _, class_name = self.target.partition(":")
+            module = importlib.import_module(module_name)
+            self._cls = getattr(module, class_name)
+        return self._cls
+
+
+PROVIDERS: Dict[str, ProviderSpec] = {
+    "grok": ProviderSpec("grok", "hub.clients.grok:GrokClient", "Grok"),
+    "claude": ProviderSpec("claude", "hub.clients.claude:ClaudeClient", "Claude"),
+    "gemini": ProviderSpec("gemini", "hub.clients.gemini:GeminiClient", "Gemini"),
+    "openai": ProviderSpec("openai", "hub.clients.openai_client:OpenAIClient", "OpenAI", takes_model=True),
+    # Offline provider for benchmarks and demos
+    "mock": ProviderSpec("mock", "hub.clients.mock:MockClient", "Mock", needs_key=False),
+}
+
+# model name -> provider name
+MODELS: Dict[str, str] = {
+    "grok": "grok",
+    "claude": "claude",
+    "gemini": "gemini",
+    "gpt-4": "openai",
+    "gpt-3.5-turbo": "openai",
+    "gpt-4o": "openai",
+    "mock": "mock",
+}
+
+_entry_points_loaded = False
+
+
+def register_provider(name: str, target: str, models: Optional[List[str]] = None,
+                      label: Optional[str] = None, takes_model: bool = False, needs_key: bool = True):
+    """Register a provider and the model names that route to it."""
+    PROVIDERS[name] = ProviderSpec(name, target, label, takes_model, needs_key)
+    for model in models or [name]:
+        MODELS[model] = name
+
+
+def _iter_entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return eps.select(group=ENTRY_POINT_GROUP)
+    return eps.get(ENTRY_POINT_GROUP, [])
+
+
+def load_entry_points():
+    """Register third-party providers from the ``hub.providers`` entry point group.
+    
+    Each entry point name is a model name and its value a ``"module:Class"``
+    BaseClient subclass. Only metadata is read here; the plugin module is
+    imported when the model is selected.
+    """
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for ep in _iter_entry_points():
+        if ep.name not in MODELS:
+            register_provider(ep.name, ep.value)
+
+
+def resolve_model(model: str) -> ProviderSpec:
+    # Built-in models never pay for the entry point scan
+    if model not in MODELS:
+        load_entry_points()
+    if model not in MODELS:
+        raise ValueError(f"Unsupported model: {model}")
+    return PROVIDERS[MODELS[model]]
+
+
+def available_models() -> List[str]:
+    load_entry_points()
+    return list(MODELS)
+
+
+def load_client_class(model: str) -> Type[BaseClient]:
+    return resolve_model(model).load()
+
+
+def create_client(model: str, api_key: str) -> BaseClient:
+    spec = resolve_model(model)
+    cls = spec.load()
+    if spec.takes_model:
+        client = cls(api_key, model)
+    else:
+        client = cls(api_key)
+    client.provider_name = spec.name
+    return client
@@ -0,0 +1,77 @@
+# hub/clients/wrapper.py
+from typing import AsyncGenerator, Generator, Optional
+
+from .base import BaseClient, Messages
+
+
+class ClientWrapper(BaseClient):
+    """Base for clients that decorate another client (caching, retries, ...).
+    
+    Every call is forwarded to the wrapped client unchanged; subclasses
+    override only the methods they care about. Attributes not defined here
+    (``client``, ``async_client``, ...) resolve on the wrapped client.
+    """
+    
+    def __init__(self, wrapped: BaseClient):
+        super().__init__(wrapped.api_key)
+        self.wrapped = wrapped
+    
+    def __getattr__(self, name):
+        # Only called for attributes missing on the wrapper itself
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+    
+    @property
+    def provider_name(self) -> str:
+        return self.wrapped.provider_name
+    
+    @property
+    def temperature(self) -> float:
+        return self.wrapped.temperature
+    
+    @temperature.setter
+    def temperature(self, value: float):
+        self.wrapped.temperature = value
+    
+    @property
+    def last_usage(self):
+        return self.wrapped.last_usage
+    
+    def reset_usage(self):
+        self.wrapped.reset_usage()
+    
+    @property
+    def last_stream_metrics(self):
+        return self.wrapped.last_stream_metrics
+    
+    @property
+    def model_name(self) -> str:
+        return self.wrapped.model_name
+    
+    @property
+    def max_tokens(self) -> int:
+        return self.wrapped.max_tokens
+    
+    @property
+    def context_window(self) -> int:
+        return self.wrapped.context_window
+    
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        return self.wrapped.chat(messages, system_prompt)
+    
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        return self.wrapped.chat_stream(messages, system_prompt)
+    
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        return await self.wrapped.achat(messages, system_prompt)
+    
+    def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        return self.wrapped.achat_stream(messages, system_prompt)
+    
+    def unwrap(self) -> BaseClient:
+        """Return the innermost provider client."""
+        client = self.wrapped
+        while isinstance(client, ClientWrapper):
+            client = client.wrapped
+        return client
@@ -0,0 +1,295 @@
+# hub/compaction.py
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .clients.base import BaseClient, current_usage
+from .context import context_budget
+from .usage import UsageTracker
+from .utils.tokens import estimate_tokens
+
+# ``user`` text of the turn that holds a compaction summary
+SUMMARY_MARKER = "[Previous conversation summary]"
+SUMMARY_SYSTEM = "You are a helpful assistant that summarizes conversations concisely."
+# Largest piece of conversation sent in one summary request; smaller
+# pieces are summarized faster and in parallel
+MAX_CHUNK_TOKENS = 6000
+
+_MAP_PROMPT = (
+    "Summarize this part of a longer conversation. Keep facts, decisions, code and "
+    "open questions; leave out small talk.\n\n{text}"
+)
+AUTO_INSTRUCTIONS = (
+    "Summarize our conversation so far. The summary replaces these turns, so keep "
+    "facts, decisions, code and open questions."
+)
+
+_MERGE_PROMPT = (
+    "Merge these summaries of consecutive parts of one conversation into a single "
+    "summary, keeping their order.\n\n{text}"
+)
+
+
+def format_turns(turns: List[Dict[str, str]]) -> str:
+    return "".join(f"User: {turn['user']}\nAI: {turn['assistant']}\n\n" for turn in turns)
+
+
+def _join_parts(summaries: List[str]) -> str:
+    return "\n\n".join(f"Part {i}:\n{summary}" for i, summary in enumerate(summaries, 1))
+
+
+async def _gather_all(coros) -> List[str]:
+    """Like ``asyncio.gather``, but a failure is raised only once every request has been recorded."""
+    results = await asyncio.gather(*coros, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return list(results)
+
+
+class SummaryCache:
+    """LRU of chunk summaries, shared by manual and background compaction."""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return summary
+    
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._entries[key] = summary
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class Compactor:
+    """Map-reduce summarization of a conversation history.
+    
+    A history that fits in one chunk is summarized with a single request.
+    Longer ones are cut into chunks of at most ``chunk_tokens``, which are
+    summarized concurrently; the partial summaries are then merged in
+    groups until one request can write the final summary.
+    
+    Chunk summaries are cached by content. Chunks are cut greedily from the
+    oldest turn, so compacting a history that only grew reuses the
+    summaries of the chunks already seen, and a summary left by an earlier
+    compaction is merged as-is instead of being summarized again.
+    """
+    
+    def __init__(self, usage: Optional[UsageTracker] = None, concurrency: int = 4,
+                 chunk_tokens: Optional[int] = None, cache: Optional[SummaryCache] = None):
+        self.usage = usage
+        self.concurrency = max(1, concurrency)
+        self.chunk_tokens = chunk_tokens
+        self.cache = cache if cache is not None else SummaryCache()
+        self.requests = 0
+    
+    def chunk_limit(self, client: BaseClient) -> int:
+        return self.chunk_tokens or min(context_budget(client) // 2, MAX_CHUNK_TOKENS)
+    
+    def chunk(self, turns: List[Dict[str, str]], limit: int, provider: Optional[str] = None) -> List[str]:
+        """Group consecutive turns into texts of at most ``limit`` tokens."""
+        chunks: List[str] = []
+        current: List[str] = []
+        size = 0
+        for turn in turns:
+            text = format_turns([turn])
+            tokens = estimate_tokens(text, provider)
+            if current and size + tokens > limit:
+                chunks.append("".join(current))
+                current, size = [], 0
+            if tokens > limit:
+                # A single turn larger than a chunk is cut into chunk-sized pieces
+                step = max(len(text) * limit // tokens, 1)
+                chunks.extend(text[i:i + step] for i in range(0, len(text), step))
+                continue
+            current.append(text)
+            size += tokens
+        if current:
+            chunks.append("".join(current))
+        return chunks
+    
+    def _groups(self, summaries: List[str], limit: int, provider: Optional[str]) -> List[List[str]]:
+        groups: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for summary in summaries:
+            tokens = estimate_tokens(summary, provider)
+            # At least two per group, so every round shortens the list
+            if len(current) >= 2 and size + tokens > limit:
+                groups.append(current)
+                current, size = [], 0
+            current.append(summary)
+            size += tokens
+        if len(current) == 1 and groups:
+            groups[-1].extend(current)
+        elif current:
+            groups.append(current)
+        return groups
+    
+    def _chat(self, client: BaseClient, prompt: str) -> Tuple[str, Optional[Dict[str, int]]]:
+        client.reset_usage()
+        summary = client.chat(prompt, SUMMARY_SYSTEM)
+        # Other requests share the client, so its last_usage may already be theirs
+        return summary, current_usage()
+    
+    async def _request(self, client: BaseClient, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        reserved = 0.0
+        if self.usage is not None:
+            # Reserved, so the requests running alongside count against the budget too
+            reserved = self.usage.reserve(client, prompt, SUMMARY_SYSTEM)
+        try:
+            async with semaphore:
+                loop = asyncio.get_running_loop()
+                summary, reported = await loop.run_in_executor(None, self._chat, client, prompt)
+        finally:
+            if self.usage is not None:
+                self.usage.release(reserved)
+        self.requests += 1
+        if self.usage is not None:
+            self.usage.record(client, prompt, SUMMARY_SYSTEM, summary, reported)
+        return summary
+    
+    async def _summarize_chunk(self, client: BaseClient, chunk: str, semaphore: asyncio.Semaphore) -> str:
+        key = hashlib.sha256(f"{client.model_name}\0{chunk}".encode("utf-8")).hexdigest()
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = await self._request(client, _MAP_PROMPT.format(text=chunk), semaphore)
+            self.cache.put(key, summary)
+        return summary
+    
+    async def acompact(self, client: BaseClient, turns: List[Dict[str, str]], instructions: str) -> str:
+        provider = client.provider_name
+        limit = self.chunk_limit(client)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        text = format_turns(turns)
+        if estimate_tokens(text, provider) <= limit:
+            return await self._request(client, f"{instructions}\n\nConversation to summarize:\n{text}", semaphore)
+        
+        summaries: List[str] = []
+        if turns and turns[0]["user"] == SUMMARY_MARKER:
+            summaries.append(turns[0]["assistant"])
+            turns = turns[1:]
+        
+        chunks = self.chunk(turns, limit, provider)
+        summaries += await _gather_all(self._summarize_chunk(client, chunk, semaphore) for chunk in chunks)
+        
+        while len(summaries) > 1 and estimate_tokens(_join_parts(summaries), provider) > limit:
+            groups = self._groups(summaries, limit, provider)
+            summaries = await _gather_all(
+                self._request(client, _MERGE_PROMPT.format(text=_join_parts(group)), semaphore)
+                for group in groups
+            )
+        
+        return await self._request(
+            client,
+            f"{instructions}\n\nSummaries of consecutive parts of the conversation:\n{_join_parts(summaries)}",
+            semaphore
+        )
+    
+    def compact(self, client: BaseClient, turns: List[Dict[str, str]], instructions: str) -> str:
+        """Summary of ``turns`` written following ``instructions``."""
+        return asyncio.run(self.acompact(client, turns, instructions))
+
+
+def history_tokens(turns: List[Dict[str, str]], provider: Optional[str] = None) -> int:
+    return sum(estimate_tokens(turn["user"], provider) + estimate_tokens(turn["assistant"], provider) for turn in turns)
+
+
+class AutoCompactor:
+    """Summarizes the oldest turns in the background once history passes ``threshold`` tokens.
+    
+    ``maybe_start`` runs after a turn: it snapshots the oldest turns,
+    keeping roughly the newest ``threshold / 2`` tokens verbatim, and
+    summarizes them in a worker thread while the user reads and types.
+    The worker uses its own client from ``spare``, so its requests never
+    touch the state of the one serving the conversation; its usage is
+    recorded, and its budget reserved, in the shared ``usage`` as it goes.
+    ``apply`` runs on the session's thread between turns and never waits:
+    if the summary is ready and the snapshot is still the head of the
+    history, it returns the new history; otherwise it returns None. A
+    failed summary leaves the history untouched and is retried a few turns
+    later.
+    """
+    
+    RETRY_AFTER_TURNS = 4
+    
+    def __init__(self, compactor: Compactor, threshold: int, usage: Optional[UsageTracker] = None,
+                 spare: Optional[Callable[[BaseClient], Optional[BaseClient]]] = None):
+        self.compactor = compactor
+        self.threshold = threshold
+        self.usage = usage
+        self.spare = spare
+        self.error: Optional[str] = None
+        self._snapshot: List[Dict[str, str]] = []
+        self._summary: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._retry_at = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+    
+    def maybe_start(self, client: BaseClient, history: List[Dict[str, str]]) -> bool:
+        """Start summarizing if ``history`` is over the threshold and no summary is pending."""
+        if self._thread is not None or len(history) < max(self._retry_at, 2):
+            return False
+        provider = client.provider_name
+        if history_tokens(history, provider) < self.threshold:
+            return False
+        
+        # Keep the newest turns verbatim, at least one
+        keep = 1
+        kept_tokens = history_tokens(history[-1:], provider)
+        while keep < len(history) - 1:
+            tokens = history_tokens(history[-keep - 1:-keep], provider)
+            if kept_tokens + tokens > self.threshold // 2:
+                break
+            kept_tokens += tokens
+            keep += 1
+        
+        if len(history) - keep < 2:
+            # Nothing worth summarizing yet
+            return False
+        
+        self._snapshot = list(history[:-keep])
+        self._summary = None
+        self.error = None
+        if self.spare is not None:
+            client = self.spare(client) or client
+        self._thread = threading.Thread(target=self._run, args=(client,), name="hub-compactor", daemon=True)
+        self._thread.start()
+        return True
+    
+    def _run(self, client: BaseClient):
+        compactor = Compactor(self.usage, self.compactor.concurrency, self.compactor.chunk_tokens, self.compactor.cache)
+        try:
+            self._summary = compactor.compact(client, self._snapshot, AUTO_INSTRUCTIONS)
+        except Exception as e:
+            self.error = str(e)
+    
+    def apply(self, history: List[Dict[str, str]]) -> Optional[List[Dict[str, str]]]:
+        """The compacted history if a finished summary still applies, else None."""
+        if self._thread is None or self._thread.is_alive():
+            return None
+        self._thread = None
+        snapshot, self._snapshot = self._snapshot, []
+        if self._summary is None:
+            self._retry_at = len(history) + self.RETRY_AFTER_TURNS
+            return None
+        # /clear, /compact or a resume replaced the turns that were summarized
+        if len(history) < len(snapshot) or any(a is not b for a, b in zip(history, snapshot)):
+            return None
+        return [{"user": SUMMARY_MARKER, "assistant": self._summary}] + history[len(snapshot):]
@@ -0,0 +1,201 @@
+# hub/compare.py
+import asyncio
+import sys
+import textwrap
+import time
+from typing import Callable, List, Optional
+
+from .clients.base import BaseClient, Messages
+from .metrics import current_stream_metrics
+from .usage import BudgetExceededError, UsageTracker
+from .utils.formatting import Colors, print_bold, print_dim, print_error
+from .utils.terminal import get_terminal_height, get_terminal_width, truncate_text
+from .utils.tokens import estimate_tokens
+
+COLUMN_GAP = " │ "
+# Seconds between redraws of the live view
+FRAME_INTERVAL = 0.1
+
+
+class CompareColumn:
+    """One provider's answer in a side-by-side comparison."""
+    
+    def __init__(self, client: BaseClient):
+        self.client = client
+        self.chunks: List[str] = []
+        self.ttft: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.metrics = None
+    
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+    
+    @property
+    def label(self) -> str:
+        if self.duration is None:
+            return f"{self.client.model_name} …"
+        status = "failed" if self.error is not None else f"{self.duration:.1f}s"
+        return f"{self.client.model_name} ({status})"
+    
+    def lines(self, width: int) -> List[str]:
+        text = self.text if self.error is None else f"[error] {self.error}"
+        lines = []
+        for line in text.split("\n"):
+            lines.extend(textwrap.wrap(line, width) or [""])
+        return lines
+    
+    @property
+    def output_tokens(self) -> Optional[int]:
+        usage = self.client.last_usage
+        if usage and usage.get("output_tokens"):
+            return usage["output_tokens"]
+        return None
+
+
+def layout(columns: List[CompareColumn], width: int, height: Optional[int] = None) -> List[str]:
+    """Lay the answers out as labeled columns; ``height`` keeps only each column's tail."""
+    col_width = max((width - len(COLUMN_GAP) * (len(columns) - 1)) // len(columns), 10)
+    bodies = [column.lines(col_width) for column in columns]
+    if height is not None:
+        bodies = [body[-height:] for body in bodies]
+    
+    header = COLUMN_GAP.join(truncate_text(column.label, col_width).ljust(col_width) for column in columns)
+    rows = [
+        f"{Colors.BOLD}{header.rstrip()}{Colors.END}",
+        "─┼─".join("─" * col_width for _ in columns),
+    ]
+    for i in range(max(len(body) for body in bodies)):
+        cells = [(body[i] if i < len(body) else "").ljust(col_width) for body in bodies]
+        rows.append(COLUMN_GAP.join(cells).rstrip())
+    return rows
+
+
+class CompareView:
+    """Redraws the columns in place while streaming, then prints them in full.
+    
+    The live view shows only the last lines of each column so it fits on
+    screen; without a terminal only the final layout is printed.
+    """
+    
+    def __init__(self, columns: List[CompareColumn], live: Optional[bool] = None):
+        self.columns = columns
+        self.live = sys.stdout.isatty() if live is None else live
+        self.width = get_terminal_width()
+        self.height = max(get_terminal_height() - 6, 3)
+        self.dirty = False
+        self._drawn = 0
+    
+    def mark_dirty(self):
+        self.dirty = True
+    
+    def _clear(self):
+        if self._drawn:
+            sys.stdout.write(f"\033[{self._drawn}F\033[J")
+            self._drawn = 0
+    
+    def refresh(self):
+        if not self.live or not self.dirty:
+            return
+        self.dirty = False
+        rows = layout(self.columns, self.width, self.height)
+        self._clear()
+        sys.stdout.write("\n".join(rows) + "\n")
+        sys.stdout.flush()
+        self._drawn = len(rows)
+    
+    def finish(self):
+        self._clear()
+        print("\n".join(layout(self.columns, self.width)))
+        print()
+
+
+async def _stream_column(column: CompareColumn, messages: Messages, system_prompt: Optional[str],
+                         on_update: Callable[[], None]):
+    start = time.perf_counter()
+    try:
+        async for chunk in column.client.achat_stream(messages, system_prompt):
+            if column.ttft is None:
+                column.ttft = time.perf_counter() - start
+            column.chunks.append(chunk)
+            on_update()
+        # Each task has its own context, so this is this column's stream
+        column.metrics = current_stream_metrics()
+    except Exception as e:
+        column.error = str(e)
+    finally:
+        column.duration = time.perf_counter() - start
+        on_update()
+
+
+async def compare_async(clients: List[BaseClient], messages: Messages, system_prompt: Optional[str] = None,
+                        live: Optional[bool] = None) -> List[CompareColumn]:
+    """Stream ``messages`` from every client concurrently into a side-by-side view."""
+    columns = [CompareColumn(client) for client in clients]
+    view = CompareView(columns, live)
+    pending = {
+        asyncio.ensure_future(_stream_column(column, messages, system_prompt, view.mark_dirty))
+        for column in columns
+    }
+    try:
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=FRAME_INTERVAL)
+            view.refresh()
+    finally:
+        for task in pending:
+            task.cancel()
+        # Let the cancelled streams close their connections
+        await asyncio.gather(*pending, return_exceptions=True)
+    view.finish()
+    return columns
+
+
+def print_summary(columns: List[CompareColumn], wall_time: float):
+    print_bold(f"{'Model':<30} {'TTFT':>7} {'Total':>7} {'Chars':>7} {'Tokens':>7}")
+    for column in columns:
+        if column.error is not None:
+            print(f"{truncate_text(column.client.model_name, 30):<30} {'failed':>7}")
+            continue
+        ttft = f"{column.ttft:.2f}s" if column.ttft is not None else "-"
+        tokens = column.output_tokens
+        if tokens is None:
+            tokens = f"~{estimate_tokens(column.text, column.client.provider_name)}"
+        print(
+            f"{truncate_text(column.client.model_name, 30):<30} {ttft:>7} {column.duration:>6.2f}s "
+            f"{len(column.text):>7} {tokens:>7}"
+        )
+    sequential = sum(column.duration for column in columns)
+    print_dim(f"Wall time {wall_time:.2f}s (sequential: ~{sequential:.2f}s)")
+
+
+def run_compare(models: List[str], messages: Messages, client_factory: Callable[[str], Optional[BaseClient]],
+                system_prompt: Optional[str] = None, usage: Optional[UsageTracker] = None) -> int:
+    clients = []
+    for model in models:
+        client = client_factory(model.strip())
+        if client is None:
+            return 1
+        clients.append(client)
+    
+    if usage is not None:
+        try:
+            for client in clients:
+                usage.check_budget(client, messages, system_prompt)
+        except BudgetExceededError as e:
+            print_error(str(e))
+            return 1
+    
+    for client in clients:
+        client.reset_usage()
+    
+    start = time.perf_counter()
+    columns = asyncio.run(compare_async(clients, messages, system_prompt))
+    print_summary(columns, time.perf_counter() - start)
+    
+    if usage is not None:
+        for column in columns:
+            if column.error is None:
+                usage.record(column.client, messages, system_prompt, column.text)
+    
+    return 1 if any(column.error is not None for column in columns) else 0
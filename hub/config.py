@@ -1,13 +1,66 @@
 # grok4_cli/config.py
+import json
 import os
-import yaml
-from typing import Optional, Dict, Any
+import tempfile
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Mapping, Tuple
 from pathlib import Path
 
+# Environment variables ending in this (GROK_API_KEY, ANTHROPIC_API_KEY, a
+# plugin's <PROVIDER>_API_KEY, ...) are captured once per Config
+API_KEY_SUFFIX = "_API_KEY"
+# Parsed config.yaml as JSON, valid while the YAML file's mtime and size match
+CACHE_NAME = ".config.cache.json"
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def api_key_env(environ: Mapping[str, str]) -> Dict[str, str]:
+    """The API key variables of ``environ``."""
+    return {key: value for key, value in environ.items() if key.endswith(API_KEY_SUFFIX)}
+
+
+def _atomic_write(path: str, write):
+    """Write ``path`` through a temp file and rename, so readers never see half a file."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        # The config holds API keys
+        os.chmod(tmp_path, 0o600)
+        with os.fdopen(fd, "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
 class Config:
+    """Settings from config.yaml, overridden by API keys in the environment.
+    
+    The file is parsed once; ``refresh`` re-reads it only when its mtime or
+    size changed. A JSON copy of the parsed YAML lets startup skip importing
+    and running the YAML parser while the file is unchanged. ``set_*``
+    calls inside ``batch()`` are written together in one atomic replace.
+    """
+    
     def __init__(self, config_path: Optional[str] = None):
         self.config_path = config_path or self._get_default_config_path()
+        self._env = api_key_env(os.environ)
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._pending: Dict[str, Any] = {}
+        self._batch_depth = 0
         self._config_data = self._load_config()
     
     def _get_default_config_path(self) -> str:
@@ -16,54 +69,139 @@ class Config:
         config_dir.mkdir(exist_ok=True)
         return str(config_dir / "config.yaml")
     
+    @property
+    def _cache_path(self) -> str:
+        return os.path.join(self.config_dir, CACHE_NAME)
+    
+    def _read_cache(self, stamp: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._cache_path, "r") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict) or cached.get("stamp") != list(stamp):
+            return None
+        return cached.get("data")
+    
+    def _write_cache(self, stamp: Tuple[int, int], data: Dict[str, Any]):
+        if not data.get("config_cache", True):
+            return
+        try:
+            _atomic_write(self._cache_path, lambda f: json.dump({"stamp": list(stamp), "data": data}, f))
+        except (OSError, TypeError, ValueError):
+            # Best effort: values JSON can't hold just mean no cache
+            pass
+    
     def _load_config(self) -> Dict[str, Any]:
-        if os.path.exists(self.config_path):
-            try:
-                with open(self.config_path, 'r') as f:
-                    return yaml.safe_load(f) or {}
-            except Exception as e:
-                print(f"Warning: Could not load config file {self.config_path}: {e}")
-                return {}
-        return {}
+        stamp = _file_stamp(self.config_path)
+        self._stamp = stamp
+        if stamp is None:
+            return {}
+        
+        data = self._read_cache(stamp)
+        if data is not None:
+            return data
+        
+        try:
+            import yaml
+            with open(self.config_path, 'r') as f:
+                data = yaml.safe_load(f) or {}
+        except Exception as e:
+            print(f"Warning: Could not load config file {self.config_path}: {e}")
+            return {}
+        self._write_cache(stamp, data)
+        return data
+    
+    def refresh(self) -> bool:
+        """Reload config.yaml if it changed on disk; returns whether it did."""
+        if _file_stamp(self.config_path) == self._stamp:
+            return False
+        self._config_data = self._load_config()
+        self._config_data.update(self._pending)
+        return True
+    
+    @contextmanager
+    def batch(self):
+        """Collect ``set_*`` calls and save them once, when the outermost batch ends.
+        
+        If the block raises, its changes are dropped and the file is left as it was.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._pending:
+                self._pending.clear()
+                self._config_data = self._load_config()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._pending:
+            self.save_config()
+    
+    def _set(self, key: str, value: Any):
+        self._config_data[key] = value
+        self._pending[key] = value
+        if self._batch_depth == 0:
+            self.save_config()
     
     def save_config(self):
         try:
+            import yaml
             os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            with open(self.config_path, 'w') as f:
-                yaml.safe_dump(self._config_data, f, default_flow_style=False)
+            if _file_stamp(self.config_path) != self._stamp:
+                # Edited elsewhere since we read it: keep those edits, apply ours on top
+                self._config_data = self._load_config()
+                self._config_data.update(self._pending)
+            data = self._config_data
+            _atomic_write(self.config_path, lambda f: yaml.safe_dump(data, f, default_flow_style=False))
+            self._stamp = _file_stamp(self.config_path)
+            self._pending.clear()
+            if self._stamp is not None:
+                self._write_cache(self._stamp, data)
         except Exception as e:
             print(f"Error saving config file: {e}")
     
     @property
     def grok_api_key(self) -> Optional[str]:
         return (
-            os.environ.get("GROK_API_KEY") or
-            os.environ.get("XAI_API_KEY") or
+            self._env.get("GROK_API_KEY") or
+            self._env.get("XAI_API_KEY") or
             self._config_data.get("grok_api_key")
         )
     
     @property
     def claude_api_key(self) -> Optional[str]:
         return (
-            os.environ.get("ANTHROPIC_API_KEY") or
+            self._env.get("ANTHROPIC_API_KEY") or
             self._config_data.get("claude_api_key")
         )
     
     @property
     def gemini_api_key(self) -> Optional[str]:
         return (
-            os.environ.get("GEMINI_API_KEY") or
-            os.environ.get("GOOGLE_API_KEY") or
+            self._env.get("GEMINI_API_KEY") or
+            self._env.get("GOOGLE_API_KEY") or
             self._config_data.get("gemini_api_key")
         )
     
     @property
     def openai_api_key(self) -> Optional[str]:
         return (
-            os.environ.get("OPENAI_API_KEY") or
+            self._env.get("OPENAI_API_KEY") or
             self._config_data.get("openai_api_key")
         )
     
+    def get_api_key(self, provider: str) -> Optional[str]:
+        attr = f"{provider}_api_key"
+        if isinstance(getattr(type(self), attr, None), property):
+            return getattr(self, attr)
+        # Plugin providers: <PROVIDER>_API_KEY or <provider>_api_key in config.yaml
+        return (
+            self._env.get(f"{provider.upper()}_API_KEY") or
+            self._config_data.get(attr)
+        )
+    
     @property
     def default_model(self) -> str:
         return self._config_data.get("default_model", "grok")
@@ -76,30 +214,124 @@ class Config:
     def temperature(self) -> float:
         return self._config_data.get("temperature", 0.7)
     
+    @property
+    def context_budget(self) -> Optional[int]:
+        return self._config_data.get("context_budget")
+    
+    @property
+    def prices(self) -> Dict[str, Dict[str, float]]:
+        return self._config_data.get("prices") or {}
+    
+    @property
+    def budget_limit(self) -> Optional[float]:
+        return self._config_data.get("budget_limit")
+    
+    @property
+    def expected_output_tokens(self) -> Optional[int]:
+        """Reply length the budget check assumes per request; null assumes max_tokens."""
+        return self._config_data.get("expected_output_tokens", 1024)
+    
+    @property
+    def show_metrics(self) -> bool:
+        return bool(self._config_data.get("show_metrics", False))
+    
+    @property
+    def prompt_caching(self) -> bool:
+        return bool(self._config_data.get("prompt_caching", True))
+    
     @property
     def system_prompt(self) -> Optional[str]:
         return self._config_data.get("system_prompt")
     
+    @property
+    def config_dir(self) -> str:
+        return os.path.dirname(os.path.abspath(self.config_path))
+    
+    @property
+    def cache_enabled(self) -> bool:
+        return bool(self._config_data.get("cache", False))
+    
+    @property
+    def cache_ttl(self) -> int:
+        return self._config_data.get("cache_ttl", 7 * 24 * 3600)
+    
+    @property
+    def cache_max_bytes(self) -> int:
+        return int(self._config_data.get("cache_max_mb", 256) * 1024 * 1024)
+    
+    @property
+    def cache_similarity(self) -> Optional[float]:
+        return self._config_data.get("cache_similarity")
+    
+    @property
+    def cache_path(self) -> str:
+        return os.path.join(self.config_dir, "cache.db")
+    
+    @property
+    def session_log(self) -> bool:
+        return bool(self._config_data.get("session_log", True))
+    
+    @property
+    def sessions_dir(self) -> str:
+        return os.path.join(self.config_dir, "sessions")
+    
+    @property
+    def search_index_path(self) -> str:
+        return os.path.join(self.config_dir, "search.db")
+    
+    @property
+    def resume_turns(self) -> int:
+        return int(self._config_data.get("resume_turns", 50))
+    
+    @property
+    def compact_concurrency(self) -> int:
+        return int(self._config_data.get("compact_concurrency", 4))
+    
+    @property
+    def auto_compact_tokens(self) -> Optional[int]:
+        """History size that starts a background compaction; unset disables it."""
+        return self._config_data.get("auto_compact_tokens")
+    
+    @property
+    def mock(self) -> Dict[str, Any]:
+        """Settings of the offline ``mock`` provider (ttft, chunk_chars, chunk_delay, ...)."""
+        return self._config_data.get("mock") or {}
+    
+    @property
+    def http(self) -> Dict[str, Any]:
+        """Connection pool settings (max_connections, keepalive_expiry, http2, ...)."""
+        return self._config_data.get("http") or {}
+    
+    @property
+    def prewarm(self) -> bool:
+        return bool(self._config_data.get("prewarm", True))
+    
+    @property
+    def max_retries(self) -> int:
+        return int(self._config_data.get("max_retries", 3))
+    
+    @property
+    def failover(self) -> List[str]:
+        """Models to try, in order, when the selected one is unavailable."""
+        failover = self._config_data.get("failover") or []
+        if isinstance(failover, str):
+            failover = failover.split(",")
+        return [model.strip() for model in failover if model.strip()]
+    
     def set_grok_api_key(self, key: str):
-        self._config_data["grok_api_key"] = key
-        self.save_config()
+        self._set("grok_api_key", key)
     
     def set_claude_api_key(self, key: str):
-        self._config_data["claude_api_key"] = key
-        self.save_config()
+        self._set("claude_api_key", key)
     
     def set_gemini_api_key(self, key: str):
-        self._config_data["gemini_api_key"] = key
-        self.save_config()
+        self._set("gemini_api_key", key)
     
     def set_openai_api_key(self, key: str):
-        self._config_data["openai_api_key"] = key
-        self.save_config()
+        self._set("openai_api_key", key)
     
     def set_default_model(self, model: str):
-        self._config_data["default_model"] = model
-        self.save_config()
+        self._set("default_model", model)
     
     def set_system_prompt(self, prompt: str):
-        self._config_data["system_prompt"] = prompt
-        self.save_config()
\ No newline at end of file
+        self._set("system_prompt", prompt)
\ No newline at end of file
@@ -0,0 +1,88 @@
+# hub/context.py
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from .clients.base import BaseClient
+from .utils.tokens import MESSAGE_OVERHEAD, estimate_tokens
+
+
+def context_budget(client: BaseClient, override: Optional[int] = None) -> int:
+    """Input tokens available for history + prompt on ``client``.
+    
+    The model's context window minus the room reserved for the reply
+    (``max_tokens``, capped at half the window so history always fits).
+    """
+    window = client.context_window
+    reserve = min(client.max_tokens, window // 2)
+    budget = window - reserve
+    if override:
+        budget = min(budget, override)
+    return budget
+
+
+class ContextWindow:
+    """Sliding window of the most recent turns that fits a token budget.
+    
+    Each turn's token estimate is computed once, when it is appended, and a
+    running total is kept, so building the request for a new message only
+    walks the turns still in the window rather than the whole history.
+    
+    When the window overflows it is trimmed down to ``low_water`` of the
+    limit rather than by a single turn. The oldest turn then stays the same
+    for several requests, which keeps the request prefix byte-stable for
+    provider-side prompt caching.
+    """
+    
+    def __init__(self, budget: int, provider: Optional[str] = None, low_water: float = 0.75):
+        self.budget = budget
+        self.provider = provider
+        self.low_water = low_water
+        self.tokens = 0
+        self.dropped = 0
+        self._turns: Deque[Tuple[Dict[str, str], int]] = deque()
+    
+    def __len__(self) -> int:
+        return len(self._turns)
+    
+    def append(self, user: str, assistant: str):
+        tokens = (
+            estimate_tokens(user, self.provider) +
+            estimate_tokens(assistant, self.provider) +
+            2 * MESSAGE_OVERHEAD
+        )
+        self._turns.append(({"user": user, "assistant": assistant}, tokens))
+        self.tokens += tokens
+        self._trim(self.budget)
+    
+    def reset(self, turns: Iterable[Dict[str, str]] = ()):
+        self._turns.clear()
+        self.tokens = 0
+        self.dropped = 0
+        for turn in turns:
+            self.append(turn["user"], turn["assistant"])
+    
+    def _trim(self, limit: int):
+        if self.tokens <= limit:
+            return
+        target = int(limit * self.low_water)
+        while self._turns and self.tokens > target:
+            _, tokens = self._turns.popleft()
+            self.tokens -= tokens
+            self.dropped += 1
+    
+    def messages(self, message: str, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        """Message list for a request: windowed history followed by ``message``."""
+        # The new prompt and system prompt are paid for out of the same budget
+        reserved = (
+            estimate_tokens(message, self.provider) +
+            estimate_tokens(system_prompt, self.provider) +
+            2 * MESSAGE_OVERHEAD
+        )
+        self._trim(max(self.budget - reserved, 0))
+        
+        messages = []
+        for turn, _ in self._turns:
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": turn["assistant"]})
+        messages.append({"role": "user", "content": message})
+        return messages
@@ -0,0 +1,409 @@
+# hub/daemon.py
+import hashlib
+import json
+import os
+import socket
+import sys
+import time
+from typing import IO, List, Mapping, Optional
+
+from .config import api_key_env
+
+# Set to skip the daemon and always run in-process
+DISABLE_ENV = "HUB_NO_DAEMON"
+# Set to trace the request, which only an in-process run can do
+TRACE_ENV = "HUB_TRACE"
+SOCKET_NAME = "hub.sock"
+LOG_NAME = "daemon.log"
+START_TIMEOUT = 10.0
+
+
+def default_config_dir() -> str:
+    return os.path.join(os.path.expanduser("~"), ".ai-hub")
+
+
+def socket_path(config_path: Optional[str] = None) -> str:
+    config_dir = os.path.dirname(os.path.abspath(config_path)) if config_path else default_config_dir()
+    return os.path.join(config_dir, SOCKET_NAME)
+
+
+def key_fingerprint(environ: Mapping[str, str]) -> str:
+    """Hash of the API keys in ``environ``, to tell whether the daemon sees the same ones."""
+    keys = json.dumps(sorted(api_key_env(environ).items()))
+    return hashlib.sha256(keys.encode("utf-8")).hexdigest()
+
+
+def parse_oneshot(argv: List[str]) -> Optional[dict]:
+    """The request for a plain one-shot ``hub [-m MODEL] [-c FILE] [--usage] [--metrics] PROMPT``.
+    
+    Anything else (interactive mode, setup, subcommands, other flags)
+    returns None and runs in-process.
+    """
+    request = {"model": None, "config": None, "usage": False, "metrics": False}
+    prompt = []
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-m", "--model", "-c", "--config"):
+            value = next(args, None)
+            if value is None:
+                return None
+            request["model" if arg in ("-m", "--model") else "config"] = value
+        elif arg.startswith("--model="):
+            request["model"] = arg.split("=", 1)[1]
+        elif arg.startswith("--config="):
+            request["config"] = arg.split("=", 1)[1]
+        elif arg in ("--usage", "--metrics"):
+            request[arg[2:]] = True
+        elif arg.startswith("-"):
+            return None
+        else:
+            prompt.append(arg)
+    if not prompt or prompt[0] in ("search", "daemon"):
+        return None
+    request["prompt"] = " ".join(prompt)
+    if not request["prompt"].strip():
+        return None
+    return request
+
+
+def _connect(path: str, timeout: Optional[float] = None) -> Optional[socket.socket]:
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _send(sock: socket.socket, message: dict):
+    sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    """Run a one-shot prompt on the daemon; None means "no daemon, run in-process".
+    
+    The daemon also declines, before answering, when the caller's API key
+    environment differs from its own.
+    """
+    if os.environ.get(DISABLE_ENV) or os.environ.get(TRACE_ENV):
+        return None
+    request = parse_oneshot(argv)
+    if request is None:
+        return None
+    request["keys"] = key_fingerprint(os.environ)
+    sock = _connect(socket_path(request.pop("config")))
+    if sock is None:
+        return None
+    
+    from .utils.formatting import Colors, print_error
+    started = False
+    try:
+        _send(sock, dict(request, command="prompt"))
+        for line in sock.makefile("r", encoding="utf-8"):
+            message = json.loads(line)
+            if message.get("declined"):
+                return None
+            if "chunk" in message:
+                if not started:
+                    sys.stdout.write(Colors.GREEN)
+                    started = True
+                sys.stdout.write(message["chunk"])
+                sys.stdout.flush()
+            elif "error" in message:
+                if started:
+                    print(Colors.END)
+                print_error(message["error"])
+                return 1
+            elif message.get("done"):
+                print(f"{Colors.END}" if started else "")
+                for extra in ("metrics", "usage"):
+                    if message.get(extra) is not None:
+                        value = message[extra]
+                        print(value if isinstance(value, str) else json.dumps(value), file=sys.stderr)
+                return 0
+    except KeyboardInterrupt:
+        print(Colors.END if started else "")
+        return 130
+    except OSError:
+        if not started:
+            # The daemon went away before answering
+            return None
+    finally:
+        sock.close()
+    
+    if not started:
+        return None
+    print(Colors.END)
+    print_error("Connection to the hub daemon was lost")
+    return 1
+
+
+def request(command: str, config_path: Optional[str] = None, timeout: float = 5.0) -> Optional[dict]:
+    """Send a control command (status, stop); None if no daemon is listening."""
+    sock = _connect(socket_path(config_path), timeout)
+    if sock is None:
+        return None
+    try:
+        _send(sock, {"command": command})
+        line = sock.makefile("r", encoding="utf-8").readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+class Daemon:
+    """Resident process answering one-shot prompts over a Unix socket.
+    
+    Provider SDKs stay imported and clients constructed between requests,
+    and every model's connection is kept warm in the shared HTTP pool, so
+    a forwarded ``hub "prompt"`` only pays for the request itself. Each
+    connection runs in its own thread with its own usage accounting.
+    config.yaml is re-checked on every request; when it changed, clients
+    are rebuilt from the new settings.
+    """
+    
+    def __init__(self, config_path: Optional[str] = None):
+        import threading
+        from .config import Config
+        
+        self.config = Config(config_path)
+        self.keys = key_fingerprint(os.environ)
+        self.path = socket_path(self.config.config_path)
+        self.started = time.time()
+        self.requests = 0
+        self.warmers = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._load()
+    
+    def _load(self):
+        """Build the client pool, cache and HTTP settings from the current config."""
+        from .cli import build_client, create_parser, open_cache
+        from .clients import http
+        from .clients.pool import ClientPool
+        
+        for warmer in self.warmers.values():
+            warmer.stop()
+        self.warmers = {}
+        config = self.config
+        http.configure(config.http)
+        # The cache as configured, without command-line overrides
+        cache = open_cache(config, create_parser().parse_args([]))
+        self.pool = ClientPool(lambda model: build_client(model, config, cache))
+    
+    def refresh(self):
+        with self._lock:
+            if self.config.refresh():
+                print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} config changed, rebuilding clients", flush=True)
+                self._load()
+    
+    def default_model(self) -> str:
+        # Same choice as cli.main: grok unless no Grok key is configured
+        return "grok" if self.config.grok_api_key else self.config.default_model
+    
+    def client(self, model: str):
+        from .clients.http import ConnectionWarmer
+        with self._lock:
+            client = self.pool.get(model)
+            if client is not None and self.config.prewarm and model not in self.warmers:
+                warmer = ConnectionWarmer()
+                warmer.set_target(client)
+                warmer.start()
+                warmer.idle()
+                self.warmers[model] = warmer
+        return client
+    
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "models": self.pool.models(),
+            "connections": {model: warmer.status() for model, warmer in self.warmers.items()},
+        }
+    
+    def handle(self, message: dict, out: IO[bytes]):
+        def send(reply: dict):
+            out.write((json.dumps(reply) + "\n").encode("utf-8"))
+            out.flush()
+        
+        command = message.get("command")
+        if command == "status":
+            send(self.status())
+            return
+        if command == "stop":
+            send({"stopping": True})
+            import threading
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+            return
+        if command != "prompt":
+            send({"error": f"Unknown command: {command}"})
+            return
+        if message.get("keys") != self.keys:
+            # The caller has other API keys in its environment than the daemon
+            send({"declined": True})
+            return
+        
+        with self._lock:
+            self.requests += 1
+        self.refresh()
+        self.prompt(message, send)
+    
+    def prompt(self, message: dict, send):
+        from .clients.base import current_usage
+        from .metrics import current_stream_metrics, set_current_stream_metrics
+        from .usage import UsageTracker
+        
+        model = message.get("model") or "grok"
+        if model == "grok" and not self.config.grok_api_key:
+            model = self.config.default_model
+        client = self.client(model)
+        if client is None:
+            send({"error": f"Could not create client for model: {model} (see {LOG_NAME})"})
+            return
+        
+        warmer = self.warmers.get(model)
+        if warmer is not None:
+            warmer.busy()
+        prompt = message["prompt"]
+        usage = UsageTracker(self.config.prices, self.config.budget_limit, self.config.expected_output_tokens)
+        parts = []
+        stream = None
+        try:
+            usage.check_budget(client, prompt)
+            client.reset_usage()
+            set_current_stream_metrics(None)
+            stream = client.chat_stream(prompt)
+            for chunk in stream:
+                parts.append(chunk)
+                send({"chunk": chunk})
+        except (BrokenPipeError, ConnectionResetError):
+            # The user interrupted; closing the stream releases the provider connection
+            return
+        except Exception as e:
+            send({"error": str(e)})
+            return
+        finally:
+            if stream is not None:
+                stream.close()
+            if warmer is not None:
+                warmer.idle()
+        
+        # Read from this thread's context: other requests share the client
+        metrics = current_stream_metrics()
+        reply = {"done": True}
+        if message.get("metrics") and metrics is not None:
+            reply["metrics"] = metrics.as_dict()
+        if message.get("usage"):
+            turn = usage.record(client, prompt, None, "".join(parts), current_usage())
+            reply["usage"] = usage.format_turn(turn)
+        send(reply)
+    
+    def serve(self):
+        import socketserver
+        
+        daemon = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    return
+                try:
+                    daemon.handle(message, self.wfile)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+        
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+        
+        if os.path.exists(self.path):
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(self.path)
+        old_umask = os.umask(0o077)
+        try:
+            self._server = Server(self.path, Handler)
+        finally:
+            os.umask(old_umask)
+        
+        # Import the SDK and open a connection before the first request
+        self.client(self.default_model())
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def start(config_path: Optional[str] = None) -> int:
+    from .utils.formatting import print_error, print_info
+    
+    path = socket_path(config_path)
+    status = request("status", config_path)
+    if status is not None:
+        print_info(f"hub daemon already running (pid {status['pid']})")
+        return 0
+    
+    import subprocess
+    log_path = os.path.join(os.path.dirname(path), LOG_NAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    argv = [sys.executable, "-m", "hub.daemon"]
+    if config_path:
+        argv.append(os.path.abspath(config_path))
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(
+            argv, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            start_new_session=True, env=dict(os.environ, **{DISABLE_ENV: "1"})
+        )
+    
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            print_error(f"hub daemon exited during startup; see {log_path}")
+            return 1
+        status = request("status", config_path)
+        if status is not None:
+            print_info(f"hub daemon started (pid {status['pid']}, socket {path})")
+            return 0
+        time.sleep(0.05)
+    print_error(f"hub daemon did not start within {START_TIMEOUT:.0f}s; see {log_path}")
+    return 1
+
+
+def stop(config_path: Optional[str] = None) -> int:
+    from .utils.formatting import print_info
+    
+    if request("stop", config_path) is None:
+        print_info("hub daemon is not running")
+        return 1
+    print_info("hub daemon stopped")
+    return 0
+
+
+def show_status(config_path: Optional[str] = None) -> int:
+    from .utils.formatting import print_info
+    
+    status = request("status", config_path)
+    if status is None:
+        print_info("hub daemon is not running")
+        return 1
+    print_info(f"hub daemon running (pid {status['pid']}, up {status['uptime']:.0f}s, {status['requests']} requests)")
+    for model in status["models"]:
+        connection = status["connections"].get(model, "not pre-warmed")
+        print(f"  {model}: {connection}")
+    return 0
+
+
+if __name__ == "__main__":
+    Daemon(sys.argv[1] if len(sys.argv) > 1 else None).serve()
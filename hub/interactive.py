@@ -3,23 +3,64 @@ import readline
 import sys
 import getpass
 import json
+import sqlite3
 import time
 from datetime import datetime
 from typing import List, Optional
-from .clients.base import BaseClient
+from .clients.base import BaseClient, current_usage
+from .clients.http import ConnectionWarmer
+from .clients.pool import ClientPool
+from .compaction import SUMMARY_MARKER, AutoCompactor, Compactor
 from .config import Config
-from .utils.formatting import print_response, print_error, print_info, print_bold, print_grey, print_dim, Colors
+from .context import ContextWindow, context_budget
+from .metrics import current_stream_metrics, format_metrics, set_current_stream_metrics, summarize_metrics
+from .sessions import SessionLog
+from .usage import UsageTracker
+from .race import format_race
+from . import tracing
+from .utils.formatting import print_response, print_error, print_info, print_bold, print_grey, print_dim, Colors, StreamFormatter
+from .utils.stream import StreamPipeline
 from .utils.terminal import clear_screen
 
 
 class InteractiveSession:
-    def __init__(self, client: BaseClient, config: Config):
+    def __init__(self, client: BaseClient, config: Config, budget: Optional[float] = None,
+                 pool: Optional[ClientPool] = None, session_log: Optional[SessionLog] = None):
         self.client = client
         self.config = config
+        if pool is None:
+            pool = ClientPool(self._build_client)
+            pool.add(client.model_name, client)
+        self.pool = pool
         self.conversation_history: List[dict] = []
         self.system_prompt: Optional[str] = None
         self.start_time = time.time()
         self.total_tokens = 0
+        self.usage = UsageTracker(config.prices, budget if budget is not None else config.budget_limit,
+                                  config.expected_output_tokens)
+        self.stream_metrics: List[dict] = []
+        self.show_metrics = config.show_metrics
+        self.context = ContextWindow(context_budget(client, config.context_budget), client.provider_name)
+        self.compactor = Compactor(self.usage, concurrency=config.compact_concurrency)
+        self.auto_compactor: Optional[AutoCompactor] = None
+        if config.auto_compact_tokens:
+            self.auto_compactor = AutoCompactor(self.compactor, config.auto_compact_tokens, self.usage, self.pool.spare)
+        self.warmer: Optional[ConnectionWarmer] = None
+        if config.prewarm:
+            self.warmer = ConnectionWarmer()
+            self.warmer.set_target(client)
+            self.warmer.start()
+        
+        self.session_log = session_log
+        self.search_index = None
+        self.resumed_turns = 0
+        if session_log is not None:
+            self.resume_session()
+        elif config.session_log:
+            try:
+                self.session_log = SessionLog(config.sessions_dir)
+            except OSError as e:
+                print_error(f"Session log disabled: {e}")
         
         # Setup readline for better input handling
         readline.set_startup_hook(None)
@@ -27,6 +68,8 @@ class InteractiveSession:
     
     def run(self):
         self.print_welcome()
+        if self.resumed_turns:
+            print_info(f"Resumed session {self.session_log.session_id} ({self.resumed_turns} turns)")
         
         while True:
             try:
@@ -74,12 +117,16 @@ class InteractiveSession:
         try:
             # Print grey prompt like Claude Code
             print(f"\n{Colors.GREY}> {Colors.END}", end="")
+            if self.warmer is not None:
+                self.warmer.idle()
             return input()
         except (KeyboardInterrupt, EOFError):
             raise
     
     def handle_command(self, command: str) -> bool:
-        command = command.strip().lower()
+        # Only the command word is case-insensitive; arguments such as prompts keep their case
+        name, _, argument = command.strip().partition(' ')
+        command = f"{name.lower()} {argument}" if argument else name.lower()
         
         if command == '/exit' or command == '/quit':
             return False
@@ -90,6 +137,8 @@ class InteractiveSession:
         elif command == '/clear':
             clear_screen()
             self.conversation_history.clear()
+            self.context.reset()
+            self.log_record("append_clear")
             print_info("Conversation history cleared")
         
         elif command == '/history':
@@ -99,29 +148,56 @@ class InteractiveSession:
             parts = command.split(' ', 1)
             if len(parts) > 1:
                 self.system_prompt = parts[1]
+                self.log_record("append_system", self.system_prompt)
                 print_info(f"System prompt set: {self.system_prompt}")
             else:
                 print_info(f"Current system prompt: {self.system_prompt or 'None'}")
         
-        elif command == '/model':
-            print_info(f"Current model: {self.client.model_name}")
-            print_info(f"Max tokens: {self.client.max_tokens}")
+        elif command.startswith('/model'):
+            parts = command.split(' ', 1)
+            if len(parts) > 1 and parts[1].strip():
+                self.switch_model(parts[1].strip())
+            else:
+                print_info(f"Current model: {self.client.model_name}")
+                print_info(f"Max tokens: {self.client.max_tokens}")
+                print_info(f"Context: {len(self.context)} turns, ~{self.context.tokens}/{self.context.budget} tokens")
+                print_info(f"Loaded models: {', '.join(self.pool.models())}")
         
         elif command == '/setup':
-            self.setup_api_keys()
+            with self.config.batch():
+                self.setup_api_keys()
         
         elif command == '/config':
+            self.config.refresh()
             self.show_config()
         
         elif command == '/cost':
             self.show_cost_info()
         
+        elif command == '/metrics':
+            self.show_metrics = not self.show_metrics
+            print_info(f"Latency metrics after each response: {'on' if self.show_metrics else 'off'}")
+        
         elif command == '/export':
             self.export_conversation()
         
         elif command == '/doctor':
             self.run_doctor()
         
+        elif command.startswith('/compare'):
+            parts = command.split(' ', 2)
+            if len(parts) < 3:
+                print_info("Usage: /compare claude,gemini,gpt-4 <prompt>")
+            else:
+                self.compare(parts[1].split(','), parts[2])
+        
+        elif command.startswith('/search'):
+            parts = command.split(' ', 1)
+            if len(parts) > 1 and parts[1].strip():
+                self.search(parts[1])
+            else:
+                print_info("Usage: /search <words>")
+        
         elif command.startswith('/compact'):
             parts = command.split(' ', 1)
             instructions = parts[1] if len(parts) > 1 else "Summarize our conversation"
@@ -138,6 +214,7 @@ class InteractiveSession:
         print("/clear                     Clear conversation history and free up context")
         print("/compact                   Clear conversation history but keep a summary in context. Optional: /compact")
         print("                          [instructions for summarization]")
+        print("/compare <models> <prompt> Stream a prompt from several models side by side")
         print("/config                    Open config panel")
         print("/cost                      Show the total cost and duration of the current session")
         print("/doctor                    Checks the health of your Grok CLI installation")
@@ -145,8 +222,10 @@ class InteractiveSession:
         print("/export                    Export the current conversation to a file or clipboard")
         print("/help                      Show help and available commands")
         print("/history                   Show conversation history")
-        print("/model                     Show current model info")
+        print("/metrics                   Toggle latency metrics after each response")
+        print("/model [name]              Show current model info, or switch to another model")
         print("/setup                     Configure API keys")
+        print("/search <words>            Search all past conversations")
         print("/system [prompt]           Set or view system prompt")
         print()
     
@@ -161,27 +240,77 @@ class InteractiveSession:
             print(f"   AI: {entry['assistant'][:100]}{'...' if len(entry['assistant']) > 100 else ''}")
     
     def process_message(self, message: str):
+        turn_start = time.perf_counter()
+        tracer = tracing.get_tracer()
+        if self.warmer is not None:
+            self.warmer.busy()
+        self.apply_auto_compaction()
+        reserved = 0.0
         try:
+            messages = self.context.messages(message, self.system_prompt)
+            # Reserved, so a background compaction counts this turn against the budget
+            reserved = self.usage.reserve(self.client, messages, self.system_prompt)
+            self.client.reset_usage()
+            set_current_stream_metrics(None)
+            
             print_info("\nThinking...")
             
             # Use streaming for better UX
-            response_text = ""
             print("\nResponse:")
             
-            for chunk in self.client.chat_stream(message, self.system_prompt):
-                print(chunk, end='', flush=True)
-                response_text += chunk
+            stream_start = time.perf_counter()
+            formatter = StreamFormatter()
+            pipeline = StreamPipeline(
+                self.client.chat_stream(messages, self.system_prompt),
+                write=lambda text: sys.stdout.write(formatter.feed(text))
+            )
+            try:
+                response_text = pipeline.run()
+            finally:
+                sys.stdout.write(formatter.finish())
             
             print("\n")
+            if tracer is not None:
+                tracer.complete("stream.render", stream_start, time.perf_counter(),
+                                render_ms=round(pipeline.render_time * 1000, 3), frames=pipeline.frames)
+            self.record_metrics()
             
             # Add to conversation history
-            self.conversation_history.append({
-                'user': message,
-                'assistant': response_text
-            })
+            with tracing.span("history.append"):
+                self.conversation_history.append({
+                    'user': message,
+                    'assistant': response_text
+                })
+                self.context.append(message, response_text)
+                self.log_record("append_turn", message, response_text, self.client.model_name)
+                self.index_session()
+                self.usage.release(reserved)
+                reserved = 0.0
+                self.usage.record(self.client, messages, self.system_prompt, response_text, current_usage())
+                self.total_tokens = self.usage.total_tokens
+            
+            if self.auto_compactor is not None:
+                self.auto_compactor.maybe_start(self.client, self.conversation_history)
             
         except Exception as e:
             print_error(f"Error: {e}")
+        finally:
+            self.usage.release(reserved)
+        
+        if tracer is not None:
+            tracer.complete("turn", turn_start, time.perf_counter(), model=self.client.model_name)
+    
+    def record_metrics(self):
+        metrics = current_stream_metrics()
+        if metrics is None:
+            return
+        sample = metrics.as_dict()
+        self.stream_metrics.append(sample)
+        race = getattr(self.client, "last_race", None)
+        if race is not None:
+            print_dim(format_race(race))
+        if self.show_metrics:
+            print_dim(format_metrics(sample))
     
     def setup_api_keys(self):
         print_bold("\n🔧 API Keys Setup")
@@ -237,7 +366,33 @@ class InteractiveSession:
         print(f"Duration: {hours:02d}:{minutes:02d}:{seconds:02d}")
         print(f"Messages: {len(self.conversation_history)}")
         print(f"Model: {self.client.model_name}")
-        print("Note: Actual API costs depend on your provider's pricing")
+        
+        totals = self.usage.totals
+        estimated = sum(1 for turn in self.usage.turns if turn["estimated"])
+        print(f"Tokens: {totals['input_tokens']} in, {totals['output_tokens']} out"
+              f"{f' ({estimated} turns estimated locally)' if estimated else ''}")
+        print(f"Prompt cache: {totals['cache_read_tokens']} read, {totals['cache_write_tokens']} written")
+        if self.usage.turns:
+            print(f"Last turn: {self.usage.format_turn(self.usage.turns[-1])}")
+        if self.usage.price_for(self.client.model_name):
+            print(f"Cost: ${self.usage.cost:.4f}")
+        else:
+            print(f"Cost: unknown (no price for {self.client.model_name}; add it under 'prices' in config.yaml)")
+        if self.usage.budget is not None:
+            print(f"Budget: ${self.usage.cost:.4f} of ${self.usage.budget:.2f} used")
+        
+        if self.stream_metrics:
+            summary = summarize_metrics(self.stream_metrics)
+            ttft = f"{summary['ttft_mean']:.2f}s mean, {summary['ttft_p95']:.2f}s p95" if summary["ttft_mean"] is not None else "-"
+            print(f"Latency: TTFT {ttft}, {summary['tokens_per_sec_mean']} tok/s mean")
+        
+        cache = getattr(self.client, "cache", None)
+        if cache is not None:
+            stats = cache.stats()
+            print(f"Cache: {stats['hits']} hits, {stats['fuzzy_hits']} near-duplicate hits, "
+                  f"{stats['misses']} misses ({stats['entries']} entries)")
+        
+        print("Note: Costs are computed from the price table; check your provider's current pricing")
     
     def export_conversation(self):
         if not self.conversation_history:
@@ -260,6 +415,14 @@ class InteractiveSession:
             print_info(f"✓ Conversation exported to: {filename}")
         except Exception as e:
             print_error(f"Export failed: {e}")
+            return
+        
+        index = self.open_search_index()
+        if index is not None:
+            try:
+                index.index_export(filename)
+            except (OSError, ValueError, sqlite3.Error):
+                pass
     
     def run_doctor(self):
         print_bold("\n🩺 Grok CLI Health Check")
@@ -287,8 +450,109 @@ class InteractiveSession:
         
         # Check model connection
         print(f"✓ Current model: {self.client.model_name}")
+        if self.warmer is not None:
+            print(f"{'✓' if self.warmer.is_warm() else '✗'} Connection: {self.warmer.status()}")
+            print(f"  Requests started warm: {self.warmer.warm_starts}, cold: {self.warmer.cold_starts}")
+        else:
+            print("✗ Connection pre-warming disabled (prewarm: false)")
         print("✓ CLI is operational")
     
+    def resume_session(self):
+        state = self.session_log.load(self.config.resume_turns)
+        self.conversation_history = state["turns"]
+        self.system_prompt = state["system_prompt"]
+        self.context.reset(self.conversation_history)
+        self.resumed_turns = len(self.conversation_history)
+    
+    def log_record(self, method: str, *args, **kwargs):
+        """Append to the session log; a failing disk disables logging, not the session."""
+        if self.session_log is None:
+            return
+        try:
+            getattr(self.session_log, method)(*args, **kwargs)
+        except OSError as e:
+            print_error(f"Session log disabled: {e}")
+            self.session_log = None
+    
+    def open_search_index(self):
+        if self.search_index is None:
+            from .search import SearchIndex
+            try:
+                self.search_index = SearchIndex(self.config.search_index_path)
+            except (OSError, sqlite3.Error) as e:
+                print_error(f"Search index unavailable: {e}")
+        return self.search_index
+    
+    def index_session(self):
+        """Index the turn just logged; a search index problem never fails the turn."""
+        if self.session_log is None:
+            return
+        index = self.open_search_index()
+        if index is None:
+            return
+        try:
+            index.sync_session(self.session_log.path)
+        except (OSError, sqlite3.Error):
+            pass
+    
+    def search(self, query: str):
+        from .search import print_results
+        index = self.open_search_index()
+        if index is None:
+            return
+        start = time.perf_counter()
+        try:
+            index.sync_sessions(self.config.sessions_dir)
+            results = index.search(query)
+        except sqlite3.Error as e:
+            print_error(f"Search failed: {e}")
+            return
+        print()
+        print_results(results, time.perf_counter() - start)
+        print()
+    
+    def close(self):
+        if self.warmer is not None:
+            self.warmer.stop()
+        if self.search_index is not None:
+            self.search_index.close()
+        if self.session_log is None:
+            return
+        try:
+            self.session_log.close()
+        except OSError:
+            pass
+        if self.session_log.records:
+            print_dim(f"Session {self.session_log.session_id} saved · resume with: hub --resume {self.session_log.session_id}")
+    
+    def _build_client(self, model: str) -> Optional[BaseClient]:
+        from .cli import build_client
+        return build_client(model, self.config)
+    
+    def switch_model(self, model: str):
+        """Continue the conversation with ``model``; its client is built once and then reused."""
+        warm = model in self.pool
+        client = self.pool.get(model)
+        if client is None:
+            return
+        
+        self.client = client
+        self.context = ContextWindow(context_budget(client, self.config.context_budget), client.provider_name)
+        self.context.reset(self.conversation_history)
+        if self.warmer is not None:
+            self.warmer.set_target(client)
+        print_info(f"Switched to {client.model_name}" + (" (reusing loaded client)" if warm else ""))
+    
+    def compare(self, models: List[str], prompt: str):
+        """Answer ``prompt`` with each model, in the current context, without adding it to history."""
+        from .cli import build_client
+        from .compare import run_compare
+        
+        messages = self.context.messages(prompt, self.system_prompt)
+        print()
+        run_compare(models, messages, lambda model: build_client(model, self.config, failover=[]), self.system_prompt, self.usage)
+        self.total_tokens = self.usage.total_tokens
+    
     def compact_conversation(self, instructions: str):
         if not self.conversation_history:
             print_info("No conversation to compact")
@@ -296,28 +560,45 @@ class InteractiveSession:
         
         print_info("Compacting conversation with AI summary...")
         
-        # Create summary prompt
-        conv_text = ""
-        for entry in self.conversation_history:
-            conv_text += f"User: {entry['user']}\nAI: {entry['assistant']}\n\n"
-        
-        summary_prompt = f"{instructions}\n\nConversation to summarize:\n{conv_text}"
-        
         try:
-            summary = self.client.chat(summary_prompt, "You are a helpful assistant that summarizes conversations concisely.")
+            requests, hits = self.compactor.requests, self.compactor.cache.hits
+            summary = self.compactor.compact(self.client, self.conversation_history, instructions)
             
             # Clear history and add summary
             self.conversation_history.clear()
             self.conversation_history.append({
-                'user': '[Previous conversation summary]',
+                'user': SUMMARY_MARKER,
                 'assistant': summary
             })
+            self.context.reset(self.conversation_history)
+            self.log_record("append_turn", SUMMARY_MARKER, summary, self.client.model_name, reset=True)
             
-            print_info("✓ Conversation compacted with AI summary")
+            requests = self.compactor.requests - requests
+            hits = self.compactor.cache.hits - hits
+            print_info(f"✓ Conversation compacted with AI summary ({requests} requests, {hits} cached parts)")
             
         except Exception as e:
             print_error(f"Compact failed: {e}")
     
+    def apply_auto_compaction(self):
+        """Swap in a finished background summary; runs between turns and never waits."""
+        if self.auto_compactor is None:
+            return
+        history = self.auto_compactor.apply(self.conversation_history)
+        if self.auto_compactor.error:
+            print_dim(f"Auto-compaction failed, history unchanged: {self.auto_compactor.error}")
+            self.auto_compactor.error = None
+        if history is None:
+            return
+        
+        replaced = len(self.conversation_history) - len(history) + 1
+        self.conversation_history = history
+        self.context.reset(history)
+        self.total_tokens = self.usage.total_tokens
+        self.log_record("append_turn", SUMMARY_MARKER, history[0]["assistant"], self.client.model_name,
+                        reset=True, keep=len(history) - 1)
+        print_dim(f"Auto-compacted {replaced} older turns into a summary")
+    
     def confirm_exit(self) -> bool:
         try:
             response = input("Are you sure you want to exit? (y/N): ")
@@ -1,9 +1,16 @@
 # hub/main.py
 import sys
-from .cli import main
+
 
 def entry_point():
-    sys.exit(main())
+    # A running daemon answers one-shot prompts without importing the CLI or any SDK
+    from .daemon import forward
+    result = forward(sys.argv[1:])
+    if result is None:
+        from .cli import main
+        result = main()
+    sys.exit(result)
+
 
 if __name__ == "__main__":
-    entry_point()
\ No newline at end of file
+    entry_point()
@@ -0,0 +1,150 @@
+# hub/metrics.py
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from . import tracing
+from .utils.tokens import CHARS_PER_TOKEN
+
+# Chunks per trace span when tracing is on
+TRACE_CHUNK_BATCH = 32
+
+# Metrics of the stream being consumed in the current thread / asyncio task,
+# so concurrent streams on one client each see their own numbers.
+_current_metrics: ContextVar = ContextVar("hub_stream_metrics", default=None)
+
+
+def current_stream_metrics() -> Optional["StreamMetrics"]:
+    return _current_metrics.get()
+
+
+def set_current_stream_metrics(metrics: Optional["StreamMetrics"]):
+    _current_metrics.set(metrics)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class StreamMetrics:
+    """Timing of one streamed response.
+    
+    ``connect`` is the time until the provider accepted the request (the
+    SDK returned a stream), ``ttft`` the time until the first text chunk.
+    Streams call ``resume`` when the consumer asks for the next chunk, so
+    time spent by the consumer is not counted as provider latency.
+    When tracing is enabled the same marks are emitted as trace spans.
+    """
+    
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        self.start = time.perf_counter()
+        self.connected_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.end: Optional[float] = None
+        self.chunks = 0
+        self.chars = 0
+        self.output_tokens: Optional[int] = None
+        self.gaps: List[float] = []
+        # Seconds between yielding a chunk and being asked for the next one
+        self.consumer_time = 0.0
+        self._last_chunk_at: Optional[float] = None
+        self._tracer = tracing.get_tracer()
+        self._batch_start = 0.0
+        self._batch_chunks = 0
+    
+    def mark_connected(self):
+        self.connected_at = time.perf_counter()
+        if self._tracer is not None:
+            self._tracer.complete(f"{self.provider}.connect", self.start, self.connected_at)
+    
+    def record_chunk(self, text: str):
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+            if self._tracer is not None:
+                self._tracer.complete(f"{self.provider}.first_byte", self.start, now)
+                self._batch_start = now
+        else:
+            self.gaps.append(now - self._last_chunk_at)
+        self._last_chunk_at = now
+        self.chunks += 1
+        self.chars += len(text)
+        
+        if self._tracer is not None:
+            self._batch_chunks += 1
+            if self._batch_chunks >= TRACE_CHUNK_BATCH:
+                self._flush_batch(now)
+    
+    def resume(self):
+        """Restart the gap clock when the generator resumes after a yield."""
+        if self._last_chunk_at is not None:
+            now = time.perf_counter()
+            self.consumer_time += now - self._last_chunk_at
+            self._last_chunk_at = now
+    
+    def _flush_batch(self, now: float):
+        if self._batch_chunks:
+            self._tracer.complete(f"{self.provider}.chunks", self._batch_start, now, chunks=self._batch_chunks)
+        self._batch_start = now
+        self._batch_chunks = 0
+    
+    def finish(self, usage: Optional[Dict[str, int]] = None):
+        self.end = time.perf_counter()
+        if usage:
+            self.output_tokens = usage.get("output_tokens") or None
+        if self._tracer is not None:
+            self._flush_batch(self.end)
+            self._tracer.complete(
+                f"{self.provider}.stream", self.start, self.end,
+                model=self.model, chunks=self.chunks, chars=self.chars
+            )
+    
+    def as_dict(self) -> dict:
+        end = self.end if self.end is not None else time.perf_counter()
+        duration = end - self.start
+        output_tokens = self.output_tokens
+        if output_tokens is None:
+            output_tokens = int(self.chars / CHARS_PER_TOKEN.get(self.provider, 4.0))
+        generation = end - self.first_token_at - self.consumer_time if self.first_token_at is not None else 0.0
+        
+        def rel(mark):
+            return round(mark - self.start, 4) if mark is not None else None
+        
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "connect": rel(self.connected_at),
+            "ttft": rel(self.first_token_at),
+            "duration": round(duration, 4),
+            "chunks": self.chunks,
+            "gap_mean": round(sum(self.gaps) / len(self.gaps), 4) if self.gaps else 0.0,
+            "gap_p95": round(percentile(self.gaps, 95), 4),
+            "output_tokens": output_tokens,
+            "tokens_per_sec": round(output_tokens / generation, 1) if generation > 0 else 0.0,
+        }
+
+
+def format_metrics(metrics: dict) -> str:
+    ttft = f"{metrics['ttft']:.2f}s" if metrics["ttft"] is not None else "-"
+    return (
+        f"TTFT {ttft} · {metrics['tokens_per_sec']} tok/s · {metrics['duration']:.2f}s total · "
+        f"{metrics['chunks']} chunks · gap mean {metrics['gap_mean'] * 1000:.0f}ms "
+        f"p95 {metrics['gap_p95'] * 1000:.0f}ms"
+    )
+
+
+def summarize_metrics(samples: List[dict]) -> dict:
+    ttfts = [m["ttft"] for m in samples if m["ttft"] is not None]
+    rates = [m["tokens_per_sec"] for m in samples if m["tokens_per_sec"]]
+    return {
+        "responses": len(samples),
+        "ttft_mean": round(sum(ttfts) / len(ttfts), 4) if ttfts else None,
+        "ttft_p95": round(percentile(ttfts, 95), 4) if ttfts else None,
+        "tokens_per_sec_mean": round(sum(rates) / len(rates), 1) if rates else None,
+    }
@@ -0,0 +1,262 @@
+# hub/race.py
+import asyncio
+import json
+import os
+import time
+from typing import AsyncGenerator, Dict, Generator, List, Optional
+
+from .clients.base import BaseClient, Messages
+from .metrics import current_stream_metrics, percentile, set_current_stream_metrics
+
+# Hedge delay used until a model has enough TTFT samples
+DEFAULT_HEDGE_DELAY = 2.0
+MIN_TTFT_SAMPLES = 5
+MAX_TTFT_SAMPLES = 50
+
+
+class TTFTHistory:
+    """Recent time-to-first-token samples per model, kept in a small JSON file."""
+    
+    def __init__(self, path: Optional[str] = None, max_samples: int = MAX_TTFT_SAMPLES):
+        self.path = path
+        self.max_samples = max_samples
+        self.samples: Dict[str, List[float]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.samples = json.load(f)
+            except (OSError, ValueError):
+                self.samples = {}
+    
+    def add(self, model: str, ttft: float):
+        samples = self.samples.setdefault(model, [])
+        samples.append(round(ttft, 4))
+        del samples[:-self.max_samples]
+    
+    def hedge_delay(self, model: str) -> float:
+        """p95 TTFT of ``model``: past this point a backup request is worth sending."""
+        samples = self.samples.get(model, [])
+        if len(samples) < MIN_TTFT_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return percentile(samples, 95)
+    
+    def save(self):
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.samples, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+async def _first_token(client: BaseClient, messages: Messages, system_prompt: Optional[str]):
+    """Open a stream and wait for its first chunk.
+    
+    Cancelling the task while it waits closes the stream, and with it the
+    provider connection, so a losing contender stops generating. A stream
+    that ends without any chunk returns ``None`` as its stream.
+    """
+    stream = client.achat_stream(messages, system_prompt)
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        return "", None, current_stream_metrics()
+    except BaseException:
+        await stream.aclose()
+        raise
+    return first, stream, current_stream_metrics()
+
+
+class RaceClient(BaseClient):
+    """Sends each request to several clients and streams the fastest one.
+    
+    The first contender to produce a token wins; all others are cancelled
+    at that moment. With ``hedge`` the contenders are started one at a
+    time, each only if the previous one has not answered within its p95
+    TTFT. ``last_race`` describes the most recent race.
+    """
+    
+    def __init__(self, clients: List[BaseClient], hedge: bool = False, history: Optional[TTFTHistory] = None):
+        super().__init__(None)
+        self.clients = clients
+        self.hedge = hedge
+        self.history = history or TTFTHistory()
+        self.winner: BaseClient = clients[0]
+        self.last_race: Optional[dict] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @property
+    def provider_name(self) -> str:
+        return self.winner.provider_name
+    
+    @property
+    def model_name(self) -> str:
+        return self.winner.model_name
+    
+    @property
+    def max_tokens(self) -> int:
+        return min(client.max_tokens for client in self.clients)
+    
+    @property
+    def context_window(self) -> int:
+        return min(client.context_window for client in self.clients)
+    
+    @property
+    def temperature(self) -> float:
+        return self.clients[0].temperature
+    
+    @temperature.setter
+    def temperature(self, value: float):
+        for client in self.clients:
+            client.temperature = value
+    
+    @property
+    def last_usage(self):
+        return self.winner.last_usage
+    
+    def reset_usage(self):
+        for client in self.clients:
+            client.reset_usage()
+    
+    @property
+    def last_stream_metrics(self):
+        return self.winner.last_stream_metrics
+    
+    async def _race(self, messages: Messages, system_prompt: Optional[str]):
+        start = time.perf_counter()
+        pending = {}
+        entries = []
+        
+        def elapsed():
+            return round(time.perf_counter() - start, 4)
+        
+        def launch(index):
+            entry = {"model": self.clients[index].model_name, "started": elapsed()}
+            entries.append(entry)
+            task = asyncio.ensure_future(_first_token(self.clients[index], messages, system_prompt))
+            pending[task] = (index, entry)
+            return time.perf_counter()
+        
+        next_index = 0
+        launched_at = start
+        while next_index < (1 if self.hedge else len(self.clients)):
+            launched_at = launch(next_index)
+            next_index += 1
+        
+        winner = None
+        # An empty reply only wins if no contender produces a token
+        empty = None
+        while winner is None:
+            if not pending:
+                if next_index >= len(self.clients):
+                    if empty is not None:
+                        winner = empty
+                        break
+                    errors = "; ".join(f"{e['model']}: {e['error']}" for e in entries)
+                    raise Exception(f"All race contenders failed: {errors}")
+                # Previous contender failed early: no point waiting out its delay
+                launched_at = launch(next_index)
+                next_index += 1
+                continue
+            
+            timeout = None
+            if next_index < len(self.clients):
+                delay = self.history.hedge_delay(self.clients[next_index - 1].model_name)
+                timeout = max(delay - (time.perf_counter() - launched_at), 0)
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launched_at = launch(next_index)
+                next_index += 1
+                continue
+            
+            for task in done:
+                index, entry = pending.pop(task)
+                if task.exception() is not None:
+                    entry["error"] = str(task.exception())
+                    entry["failed"] = elapsed()
+                elif task.result()[1] is None:
+                    entry["empty"] = elapsed()
+                    if empty is None:
+                        empty = (index, entry, task.result())
+                elif winner is None:
+                    entry["ttft"] = elapsed()
+                    winner = (index, entry, task.result())
+                else:
+                    # Finished in the same tick as the winner
+                    stream = task.result()[1]
+                    if stream is not None:
+                        await stream.aclose()
+                    entry["aborted"] = elapsed()
+        
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for index, entry in pending.values():
+            entry["aborted"] = elapsed()
+        
+        index, entry, result = winner
+        if "ttft" in entry:
+            # Only real first tokens are TTFT samples; an empty reply has none
+            self.history.add(entry["model"], entry["ttft"] - entry["started"])
+            self.history.save()
+        self.last_race = {
+            "winner": entry["model"],
+            "ttft": entry.get("ttft"),
+            "hedged": self.hedge,
+            "contenders": entries,
+        }
+        return index, result
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        index, (first, stream, metrics) = await self._race(messages, system_prompt)
+        self.winner = self.clients[index]
+        set_current_stream_metrics(metrics)
+        if first:
+            yield first
+        if stream is not None:
+            async for chunk in stream:
+                yield chunk
+    
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        chunks = []
+        async for chunk in self.achat_stream(messages, system_prompt):
+            chunks.append(chunk)
+        return "".join(chunks)
+    
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        # One loop for the client's lifetime: async SDK clients keep
+        # connection pools bound to the loop that created them
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        stream = self.achat_stream(messages, system_prompt)
+        try:
+            while True:
+                try:
+                    chunk = self._loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        finally:
+            self._loop.run_until_complete(stream.aclose())
+            set_current_stream_metrics(self.last_stream_metrics)
+    
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        return "".join(self.chat_stream(messages, system_prompt))
+
+
+def format_race(race: dict) -> str:
+    if race["ttft"] is None:
+        parts = [f"winner {race['winner']} (empty reply)"]
+    else:
+        parts = [f"winner {race['winner']} (first token {race['ttft']:.2f}s)"]
+    for entry in race["contenders"]:
+        if "aborted" in entry:
+            parts.append(f"{entry['model']} aborted @{entry['aborted']:.2f}s")
+        elif "error" in entry:
+            parts.append(f"{entry['model']} failed @{entry['failed']:.2f}s")
+        elif "empty" in entry and "ttft" not in entry:
+            parts.append(f"{entry['model']} empty @{entry['empty']:.2f}s")
+    return " · ".join(parts)
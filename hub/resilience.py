@@ -0,0 +1,272 @@
+# hub/resilience.py
+import random
+import threading
+import time
+from typing import AsyncGenerator, Callable, Dict, Generator, Iterator, List, Optional
+
+from .clients.base import BaseClient, Messages
+from .clients.errors import CircuitOpenError, ProviderError
+from .clients.wrapper import ClientWrapper
+from . import tracing
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; a server ``Retry-After`` wins."""
+    
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def delay(self, attempt: int, error: ProviderError) -> float:
+        if error.retry_after is not None:
+            return min(error.retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Stops calling a provider after ``failure_threshold`` consecutive failures.
+    
+    After ``reset_timeout`` seconds one trial request is let through
+    (half-open); its success closes the breaker, its failure re-opens it.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+    
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                # Let one trial through; others wait for its outcome
+                self.opened_at = time.monotonic()
+                return True
+            return state == "closed"
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """The process-wide breaker for ``provider``, shared by all its clients."""
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker()
+        return _breakers[provider]
+
+
+class ResilientClient(ClientWrapper):
+    """Retries transient provider errors and fails over to other models.
+    
+    Rate limits, overloads, timeouts and connection errors are retried with
+    backoff. When a provider's circuit breaker is open, or its retries are
+    exhausted, the next model of ``failover`` is tried. Streams are only
+    retried before their first chunk, so output is never duplicated.
+    Provider SDKs are built with ``max_retries=0`` so that every 429/529
+    and its Retry-After reaches this wrapper instead of being retried inside.
+    """
+    
+    def __init__(self, wrapped: BaseClient, policy: Optional[RetryPolicy] = None,
+                 failover: Optional[List[str]] = None,
+                 client_factory: Optional[Callable[[str], Optional[BaseClient]]] = None):
+        super().__init__(wrapped)
+        self.policy = policy or RetryPolicy()
+        self.failover = failover or []
+        self.client_factory = client_factory
+        self.active: BaseClient = wrapped
+        self._fallbacks: Dict[str, Optional[BaseClient]] = {}
+    
+    @property
+    def provider_name(self) -> str:
+        return self.active.provider_name
+    
+    @property
+    def model_name(self) -> str:
+        return self.active.model_name
+    
+    @property
+    def last_usage(self):
+        return self.active.last_usage
+    
+    @property
+    def last_stream_metrics(self):
+        return self.active.last_stream_metrics
+    
+    def reset_usage(self):
+        self.active = self.wrapped
+        self.wrapped.reset_usage()
+        # Only fallbacks already built; resetting must not build the rest
+        for client in list(self._fallbacks.values()):
+            if client is not None:
+                client.reset_usage()
+    
+    def _chain(self) -> Iterator[BaseClient]:
+        yield self.wrapped
+        if self.client_factory is None:
+            return
+        for model in self.failover:
+            # Fallbacks are only built (and their SDKs imported) when needed
+            if model not in self._fallbacks:
+                self._fallbacks[model] = self.client_factory(model)
+            client = self._fallbacks[model]
+            if client is not None:
+                yield client
+    
+    def _failed(self, client: BaseClient, breaker: CircuitBreaker, error: ProviderError, attempt: int) -> Optional[float]:
+        """Record a failure; return the delay before retrying, or None to give up on ``client``."""
+        if not error.retryable:
+            raise error
+        breaker.record_failure()
+        if attempt >= self.policy.max_retries or breaker.state != "closed":
+            tracing.instant("failover", provider=client.provider_name, error=type(error).__name__)
+            return None
+        delay = self.policy.delay(attempt, error)
+        tracing.instant("retry", provider=client.provider_name, attempt=attempt + 1, delay=delay)
+        return delay
+    
+    def _unavailable(self, errors: List[ProviderError]) -> ProviderError:
+        if len(errors) == 1:
+            return errors[0]
+        error = errors[-1]
+        error.args = ("; ".join(str(e) for e in errors),)
+        return error
+    
+    def _circuit_open(self, client: BaseClient) -> CircuitOpenError:
+        return CircuitOpenError(
+            f"{client.provider_name} is failing repeatedly; skipping it for now",
+            provider=client.provider_name
+        )
+    
+    def chat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        errors = []
+        for client in self._chain():
+            breaker = get_breaker(client.provider_name)
+            if not breaker.allow():
+                errors.append(self._circuit_open(client))
+                continue
+            self.active = client
+            attempt = 0
+            while True:
+                try:
+                    response = client.chat(messages, system_prompt)
+                except ProviderError as e:
+                    delay = self._failed(client, breaker, e, attempt)
+                    if delay is None:
+                        errors.append(e)
+                        break
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                breaker.record_success()
+                return response
+        raise self._unavailable(errors)
+    
+    def chat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+        errors = []
+        for client in self._chain():
+            breaker = get_breaker(client.provider_name)
+            if not breaker.allow():
+                errors.append(self._circuit_open(client))
+                continue
+            self.active = client
+            attempt = 0
+            while True:
+                started = False
+                try:
+                    for chunk in client.chat_stream(messages, system_prompt):
+                        started = True
+                        yield chunk
+                except ProviderError as e:
+                    if started:
+                        breaker.record_failure()
+                        raise
+                    delay = self._failed(client, breaker, e, attempt)
+                    if delay is None:
+                        errors.append(e)
+                        break
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                breaker.record_success()
+                return
+        raise self._unavailable(errors)
+    
+    async def achat(self, messages: Messages, system_prompt: Optional[str] = None) -> str:
+        import asyncio
+        errors = []
+        for client in self._chain():
+            breaker = get_breaker(client.provider_name)
+            if not breaker.allow():
+                errors.append(self._circuit_open(client))
+                continue
+            self.active = client
+            attempt = 0
+            while True:
+                try:
+                    response = await client.achat(messages, system_prompt)
+                except ProviderError as e:
+                    delay = self._failed(client, breaker, e, attempt)
+                    if delay is None:
+                        errors.append(e)
+                        break
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                breaker.record_success()
+                return response
+        raise self._unavailable(errors)
+    
+    async def achat_stream(self, messages: Messages, system_prompt: Optional[str] = None) -> AsyncGenerator[str, None]:
+        import asyncio
+        errors = []
+        for client in self._chain():
+            breaker = get_breaker(client.provider_name)
+            if not breaker.allow():
+                errors.append(self._circuit_open(client))
+                continue
+            self.active = client
+            attempt = 0
+            while True:
+                started = False
+                try:
+                    async for chunk in client.achat_stream(messages, system_prompt):
+                        started = True
+                        yield chunk
+                except ProviderError as e:
+                    if started:
+                        breaker.record_failure()
+                        raise
+                    delay = self._failed(client, breaker, e, attempt)
+                    if delay is None:
+                        errors.append(e)
+                        break
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                breaker.record_success()
+                return
+        raise self._unavailable(errors)
@@ -0,0 +1,191 @@
+# hub/search.py
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List
+
+from .utils.formatting import Colors, print_dim, print_info
+
+# Marks around matched terms in snippets, replaced by colors when printed
+_HIT_START = "\x02"
+_HIT_END = "\x03"
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, ``word*`` is a prefix."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """SQLite FTS5 index over past conversations.
+    
+    Session logs are indexed incrementally: for each file the byte offset
+    already indexed is remembered, so syncing after a turn only reads the
+    new record. Exported conversations are re-indexed when they change.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS turns USING fts5("
+            " user, assistant,"
+            " session UNINDEXED, model UNINDEXED, ts UNINDEXED, source UNINDEXED,"
+            " tokenize='porter unicode61')"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " path TEXT PRIMARY KEY,"
+            " offset INTEGER NOT NULL,"
+            " mtime REAL NOT NULL)"
+        )
+    
+    def _source(self, path: str):
+        return self._db.execute("SELECT offset, mtime FROM sources WHERE path = ?", (path,)).fetchone()
+    
+    def _replace_source(self, path: str):
+        self._db.execute("DELETE FROM turns WHERE source = ?", (path,))
+    
+    def _insert(self, rows: Iterable[tuple]):
+        self._db.executemany(
+            "INSERT INTO turns (user, assistant, session, model, ts, source) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+    
+    def sync_session(self, path: str) -> int:
+        """Index records appended to a session log since the last sync; returns turns added."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 0
+        session = os.path.basename(path)[:-len(".jsonl")]
+        
+        with self._lock:
+            known = self._source(path)
+            offset = known[0] if known else 0
+            if stat.st_size == offset:
+                return 0
+            
+            self._db.execute("BEGIN")
+            try:
+                if stat.st_size < offset:
+                    # Log was truncated after a crash: index it again
+                    self._replace_source(path)
+                    offset = 0
+                rows = []
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break
+                        offset += len(line)
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if record.get("type") == "turn":
+                            rows.append((record["user"], record["assistant"], session,
+                                         record.get("model"), record.get("ts"), path))
+                self._insert(rows)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sources (path, offset, mtime) VALUES (?, ?, ?)",
+                    (path, offset, stat.st_mtime)
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(rows)
+    
+    def sync_sessions(self, directory: str) -> int:
+        try:
+            names = [name for name in os.listdir(directory) if name.endswith(".jsonl")]
+        except OSError:
+            return 0
+        return sum(self.sync_session(os.path.join(directory, name)) for name in names)
+    
+    def index_export(self, path: str) -> int:
+        """Index a file written by ``/export``; unchanged files are skipped."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        
+        ts = None
+        if data.get("timestamp"):
+            try:
+                ts = datetime.fromisoformat(data["timestamp"]).timestamp()
+            except ValueError:
+                pass
+        session = os.path.splitext(os.path.basename(path))[0]
+        rows = [
+            (turn["user"], turn["assistant"], session, data.get("model"), ts, path)
+            for turn in data.get("conversation", [])
+        ]
+        
+        with self._lock:
+            known = self._source(path)
+            if known and known[1] == stat.st_mtime:
+                return 0
+            self._db.execute("BEGIN")
+            try:
+                self._replace_source(path)
+                self._insert(rows)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sources (path, offset, mtime) VALUES (?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime)
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(rows)
+    
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session, model, ts, snippet(turns, -1, ?, ?, '…', 16), bm25(turns)"
+                " FROM turns WHERE turns MATCH ? ORDER BY bm25(turns) LIMIT ?",
+                (_HIT_START, _HIT_END, match, limit)
+            ).fetchall()
+        return [
+            {"session": session, "model": model, "ts": ts, "snippet": snippet, "score": -rank}
+            for session, model, ts, snippet, rank in rows
+        ]
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def print_results(results: List[dict], elapsed: float):
+    if not results:
+        print_info(f"No matches ({elapsed * 1000:.1f} ms)")
+        return
+    
+    for i, hit in enumerate(results, 1):
+        when = datetime.fromtimestamp(hit["ts"]).strftime("%Y-%m-%d %H:%M") if hit["ts"] else "-"
+        print(f"{Colors.BOLD}{i:>2}. {hit['session']}{Colors.END} · {hit['model'] or '-'} · {when}")
+        snippet = " ".join(hit["snippet"].split())
+        print("    " + snippet.replace(_HIT_START, Colors.YELLOW).replace(_HIT_END, Colors.END))
+    print_dim(f"{len(results)} results in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,226 @@
+# hub/sessions.py
+import json
+import os
+import secrets
+import struct
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# One little-endian uint64 byte offset per record in <id>.idx; <id>.sys
+# holds the offset of the latest system prompt record
+_OFFSET = struct.Struct("<Q")
+_SYSTEM_MARK = b'{"type": "system"'
+# fsync after this many records or seconds, whichever comes first
+FSYNC_BATCH = 8
+FSYNC_INTERVAL = 2.0
+
+
+def new_session_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+
+
+def list_sessions(directory: str) -> List[str]:
+    """Session ids in ``directory``, most recently written last."""
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(".jsonl")]
+    except OSError:
+        return []
+    names.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+    return [name[:-len(".jsonl")] for name in names]
+
+
+class SessionLog:
+    """Append-only JSONL log of one interactive session.
+    
+    Every record is written with a single ``write`` of a complete line and
+    flushed to the OS immediately, so a crash of the process loses nothing;
+    ``fsync`` runs in batches. A sidecar index of record offsets lets
+    ``load`` seek straight to the last N records, and a second one points
+    at the latest system prompt, wherever it is. A torn last line is
+    skipped and a short index is repaired from the log on open.
+    """
+    
+    def __init__(self, directory: str, session_id: Optional[str] = None):
+        os.makedirs(directory, exist_ok=True)
+        self.session_id = session_id or new_session_id()
+        self.path = os.path.join(directory, f"{self.session_id}.jsonl")
+        self.index_path = os.path.join(directory, f"{self.session_id}.idx")
+        self.system_path = os.path.join(directory, f"{self.session_id}.sys")
+        self.records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        open(self.path, "ab").close()
+        self._index = open(self.index_path, "ab")
+        self._repair_index()
+        self._log = open(self.path, "ab")
+    
+    @classmethod
+    def exists(cls, directory: str, session_id: str) -> bool:
+        return os.path.exists(os.path.join(directory, f"{session_id}.jsonl"))
+    
+    def _offsets(self) -> List[int]:
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % _OFFSET.size
+        return [offset for (offset,) in _OFFSET.iter_unpack(data[:usable])]
+    
+    def _repair_index(self):
+        """Index records written after the last indexed one, e.g. after a crash."""
+        size = os.path.getsize(self.path)
+        offsets = [offset for offset in self._offsets() if offset < size]
+        with open(self.index_path, "r+b") as f:
+            f.truncate(len(offsets) * _OFFSET.size)
+        
+        position = offsets[-1] if offsets else 0
+        with open(self.path, "rb") as f:
+            f.seek(position)
+            if offsets:
+                # Skip the last indexed record itself
+                position += len(f.readline())
+            while position < size:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                self._index.write(_OFFSET.pack(position))
+                offsets.append(position)
+                if line.startswith(_SYSTEM_MARK):
+                    self._write_system_offset(position)
+                position += len(line)
+        self._index.flush()
+        if position < size:
+            # Drop a torn last line so the next record starts on a fresh one
+            os.truncate(self.path, position)
+        self.records = len(offsets)
+    
+    def _write_system_offset(self, offset: int):
+        with open(self.system_path, "wb") as f:
+            f.write(_OFFSET.pack(offset))
+    
+    def _append(self, record: dict) -> int:
+        offset = self._log.tell()
+        self._log.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._log.flush()
+        self._index.write(_OFFSET.pack(offset))
+        self._index.flush()
+        
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_BATCH or time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+            self.sync()
+        return offset
+    
+    def sync(self):
+        if self._unsynced:
+            os.fsync(self._log.fileno())
+            os.fsync(self._index.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def append_turn(self, user: str, assistant: str, model: Optional[str] = None, reset: bool = False,
+                    keep: int = 0):
+        """Log a completed turn; ``reset`` marks it as replacing earlier turns (compaction).
+        
+        With ``keep``, the last ``keep`` turns before it survive the reset and
+        follow it in the loaded history.
+        """
+        record = {"type": "turn", "ts": time.time(), "model": model, "user": user, "assistant": assistant}
+        if reset:
+            record["reset"] = True
+        if keep:
+            record["keep"] = keep
+        self._append(record)
+        self.records += 1
+    
+    def append_clear(self):
+        self._append({"type": "clear", "ts": time.time()})
+        self.records += 1
+    
+    def append_system(self, prompt: Optional[str]):
+        self._write_system_offset(self._append({"type": "system", "ts": time.time(), "prompt": prompt}))
+        self.records += 1
+    
+    def _read_records(self, offset: int) -> List[dict]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            lines = f.read().splitlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Torn write at the end of the log
+                continue
+        return records
+    
+    def _system_prompt(self) -> Optional[str]:
+        """The latest system prompt, read through the ``.sys`` pointer."""
+        try:
+            with open(self.system_path, "rb") as f:
+                (offset,) = _OFFSET.unpack(f.read(_OFFSET.size))
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                record = json.loads(f.readline())
+        except (OSError, ValueError, struct.error):
+            return None
+        return record.get("prompt") if record.get("type") == "system" else None
+    
+    @staticmethod
+    def _replay(records: List[dict], complete: bool) -> Tuple[dict, int]:
+        """State after ``records``, and how many turns kept by a compaction are missing.
+        
+        ``complete`` says whether ``records`` start at the beginning of the
+        log; otherwise a compaction may keep turns from before them. The
+        state has a ``system_prompt`` only if ``records`` set one.
+        """
+        state: dict = {}
+        turns: List[dict] = []
+        missing = 0
+        for record in records:
+            if record["type"] == "clear":
+                turns = []
+                complete = True
+                missing = 0
+            elif record["type"] == "system":
+                state["system_prompt"] = record["prompt"]
+            elif record["type"] == "turn":
+                turn = {"user": record["user"], "assistant": record["assistant"]}
+                if record.get("reset"):
+                    keep = record.get("keep", 0)
+                    missing = 0 if complete else max(keep - len(turns), 0)
+                    turns = [turn] + (turns[-keep:] if keep else [])
+                else:
+                    turns.append(turn)
+        state["turns"] = turns
+        return state, missing
+    
+    def load(self, limit: int = 50) -> dict:
+        """Last ``limit`` records as ``{"turns": [...], "system_prompt": ...}``.
+        
+        Only the tail of the log is read, reaching further back when a
+        compaction in it kept turns from before it. Turns before a clear
+        or a compaction are dropped. The system prompt is the latest one
+        set, even if it is older than the tail.
+        """
+        offsets = self._offsets()
+        if not offsets:
+            return {"turns": [], "system_prompt": None}
+        
+        start = max(len(offsets) - limit, 0)
+        while True:
+            result, missing = self._replay(self._read_records(offsets[start]), start == 0)
+            if not missing or start == 0:
+                break
+            start = max(start - missing, 0)
+        
+        if "system_prompt" not in result:
+            result["system_prompt"] = self._system_prompt()
+        return result
+    
+    def close(self):
+        self.sync()
+        self._log.close()
+        self._index.close()
+        if not self.records:
+            # Nothing was said; don't leave an empty session behind
+            os.remove(self.path)
+            os.remove(self.index_path)
@@ -0,0 +1,157 @@
+# hub/tracing.py
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "start")
+    
+    def __init__(self, tracer: "Tracer", name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.complete(self.name, self.start, time.perf_counter(), **self.args)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+    args: dict = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects spans as Chrome trace events (chrome://tracing, Perfetto).
+    
+    Events are buffered in memory and written as one JSON document on exit,
+    so no collector or network access is needed.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = os.getpid()
+        self.events: List[dict] = []
+        self._lock = threading.Lock()
+    
+    def span(self, name: str, **args) -> Span:
+        return Span(self, name, args)
+    
+    def complete(self, name: str, start: float, end: float, **args):
+        """Record a span from two ``time.perf_counter()`` readings."""
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+    
+    def instant(self, name: str, **args):
+        event = {
+            "name": name,
+            "ph": "i",
+            "s": "t",
+            "ts": time.perf_counter() * 1e6,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+    
+    def write(self):
+        with self._lock:
+            events = list(self.events)
+        try:
+            with open(self.path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        except OSError as e:
+            print(f"Warning: Could not write trace file {self.path}: {e}")
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable(path: str) -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path)
+        atexit.register(_tracer.write)
+    return _tracer
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, **args):
+    """Context manager timing a block; a shared no-op when tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return Span(tracer, name, args)
+
+
+def instant(name: str, **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.instant(name, **args)
+
+
+def complete(name: str, start: float, end: float, **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.complete(name, start, end, **args)
+
+
+def traced(name: str):
+    """Decorate a client method so each call becomes a ``<provider>.<name>`` span."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                if _tracer is None:
+                    return await fn(self, *args, **kwargs)
+                with _tracer.span(f"{self.provider_name}.{name}", model=self.model_name):
+                    return await fn(self, *args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            if _tracer is None:
+                return fn(self, *args, **kwargs)
+            with _tracer.span(f"{self.provider_name}.{name}", model=self.model_name):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
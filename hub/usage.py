@@ -0,0 +1,137 @@
+# hub/usage.py
+import threading
+from typing import Dict, List, Optional
+
+from .clients.base import BaseClient, Messages, normalize_messages, usage_dict
+from .utils.tokens import MESSAGE_OVERHEAD, estimate_messages_tokens, estimate_tokens
+
+# USD per million tokens. cache_read / cache_write default to the input price.
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "grok-beta": {"input": 5.0, "output": 15.0},
+    "claude-3-5-sonnet-20241022": {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75},
+    "gemini-pro": {"input": 0.50, "output": 1.50},
+    "gpt-4": {"input": 30.0, "output": 60.0},
+    "gpt-4o": {"input": 2.50, "output": 10.0, "cache_read": 1.25},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+}
+
+
+class BudgetExceededError(Exception):
+    pass
+
+
+def usage_cost(usage: Dict[str, int], price: Optional[Dict[str, float]]) -> float:
+    """Cost in USD of one request. ``input_tokens`` includes cached tokens."""
+    if not price:
+        return 0.0
+    cache_read = usage.get("cache_read_tokens", 0)
+    cache_write = usage.get("cache_write_tokens", 0)
+    uncached = max(usage.get("input_tokens", 0) - cache_read - cache_write, 0)
+    total = (
+        uncached * price.get("input", 0.0) +
+        cache_read * price.get("cache_read", price.get("input", 0.0)) +
+        cache_write * price.get("cache_write", price.get("input", 0.0)) +
+        usage.get("output_tokens", 0) * price.get("output", 0.0)
+    )
+    return total / 1_000_000
+
+
+class UsageTracker:
+    """Per-turn and per-session token and cost accounting.
+    
+    Exact provider ``usage`` is used when the client reports it; otherwise
+    the turn is estimated locally and flagged as such. Safe to share with
+    background work such as auto-compaction.
+    """
+    
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None, budget: Optional[float] = None,
+                 expected_output: Optional[int] = None):
+        self.prices = dict(DEFAULT_PRICES)
+        if prices:
+            self.prices.update(prices)
+        self.budget = budget
+        # Reply length budgeted per request; None budgets the full max_tokens
+        self.expected_output = expected_output
+        self.turns: List[dict] = []
+        self.totals = usage_dict()
+        self.cost = 0.0
+        # Projected cost of reserved requests not recorded yet
+        self.reserved = 0.0
+        self._lock = threading.RLock()
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.totals["input_tokens"] + self.totals["output_tokens"]
+    
+    def price_for(self, model: str) -> Optional[Dict[str, float]]:
+        return self.prices.get(model)
+    
+    def estimate_request(self, client: BaseClient, messages: Messages, system_prompt: Optional[str] = None) -> Dict[str, int]:
+        provider = client.provider_name
+        input_tokens = estimate_messages_tokens(normalize_messages(messages), provider)
+        if system_prompt:
+            input_tokens += estimate_tokens(system_prompt, provider) + MESSAGE_OVERHEAD
+        return usage_dict(input_tokens)
+    
+    def projected_cost(self, client: BaseClient, messages: Messages, system_prompt: Optional[str] = None) -> float:
+        """Cost of a request: its input plus a reply of ``expected_output`` tokens, at most ``max_tokens``."""
+        usage = self.estimate_request(client, messages, system_prompt)
+        output_tokens = client.max_tokens
+        if self.expected_output is not None:
+            output_tokens = min(output_tokens, self.expected_output)
+        usage["output_tokens"] = output_tokens
+        return usage_cost(usage, self.price_for(client.model_name))
+    
+    def check_budget(self, client: BaseClient, messages: Messages, system_prompt: Optional[str] = None) -> float:
+        """Raise BudgetExceededError if this request's projected cost would pass the budget; return that cost."""
+        if self.budget is None:
+            return 0.0
+        projected = self.projected_cost(client, messages, system_prompt)
+        with self._lock:
+            if self.cost + self.reserved + projected > self.budget:
+                in_flight = f", ${self.reserved:.4f} in flight" if round(self.reserved, 4) else ""
+                raise BudgetExceededError(
+                    f"Budget limit ${self.budget:.2f} reached (spent ${self.cost:.4f}{in_flight}, "
+                    f"next request up to ${projected:.4f})"
+                )
+        return projected
+    
+    def reserve(self, client: BaseClient, messages: Messages, system_prompt: Optional[str] = None) -> float:
+        """``check_budget`` for concurrent requests: later checks count this one until it is released.
+        
+        Returns the amount to ``release`` once the request is recorded.
+        """
+        with self._lock:
+            projected = self.check_budget(client, messages, system_prompt)
+            self.reserved += projected
+        return projected
+    
+    def release(self, amount: float):
+        with self._lock:
+            self.reserved = max(self.reserved - amount, 0.0)
+    
+    def record(self, client: BaseClient, messages: Messages, system_prompt: Optional[str], response: str,
+               usage: Optional[Dict[str, int]] = None) -> dict:
+        """Add one request; ``usage`` overrides ``client.last_usage`` for concurrent requests."""
+        if usage is None:
+            usage = client.last_usage
+        estimated = usage is None
+        if estimated:
+            usage = self.estimate_request(client, messages, system_prompt)
+            usage["output_tokens"] = estimate_tokens(response, client.provider_name)
+        
+        cost = usage_cost(usage, self.price_for(client.model_name))
+        turn = dict(usage, model=client.model_name, cost=cost, estimated=estimated)
+        with self._lock:
+            self.turns.append(turn)
+            for key in self.totals:
+                self.totals[key] += usage.get(key, 0)
+            self.cost += cost
+        return turn
+    
+    def format_turn(self, turn: dict) -> str:
+        marker = "~" if turn["estimated"] else ""
+        return (
+            f"{marker}{turn['input_tokens']} in ({turn['cache_read_tokens']} cached), "
+            f"{marker}{turn['output_tokens']} out · ${turn['cost']:.4f}"
+        )
@@ -55,4 +55,137 @@ def format_response(text: str) -> str:
         else:
             formatted_lines.append(line)
     
-    return '\n'.join(formatted_lines)
\ No newline at end of file
+    return '\n'.join(formatted_lines)
+
+
+class StreamFormatter:
+    """Incremental version of ``format_response`` for streamed Markdown.
+    
+    ``feed`` takes raw chunks and returns them with colors added, keeping
+    fence, heading, list and inline-code state across chunk boundaries.
+    Each character is looked at once; only the first few characters of a
+    line are held back until it is clear what kind of line it is.
+    """
+    
+    def __init__(self):
+        self.in_fence = False
+        self.in_code = False
+        self.line_style = ""
+        self.at_line_start = True
+        self._held = ""
+    
+    def _classify(self, held: str, complete: bool = False):
+        """Kind of the line starting with ``held``, or None if more text is needed."""
+        stripped = held.lstrip(" \t")
+        if not stripped:
+            return "text" if complete else None
+        if stripped.startswith("```"):
+            return "fence"
+        if "```".startswith(stripped) and not complete:
+            return None
+        if self.in_fence:
+            return "code"
+        if stripped[0] == "#":
+            return "heading"
+        if stripped[0] in "-*+":
+            if len(stripped) == 1:
+                return "text" if complete else None
+            return "bullet" if stripped[1] == " " else "text"
+        if stripped[0].isdigit():
+            digits = len(stripped) - len(stripped.lstrip("0123456789"))
+            rest = stripped[digits:]
+            if not rest or rest == ".":
+                return "text" if complete else None
+            return "number" if rest.startswith(". ") else "text"
+        return "text"
+    
+    def _start_line(self, kind: str, out: list):
+        held = self._held
+        self._held = ""
+        self.at_line_start = False
+        
+        if kind == "fence":
+            self.in_fence = not self.in_fence
+            self.line_style = Colors.YELLOW
+            out.append(Colors.YELLOW + held)
+        elif kind == "code":
+            self.line_style = Colors.YELLOW
+            out.append(Colors.YELLOW + held)
+        elif kind == "heading":
+            self.line_style = Colors.BOLD
+            out.append(Colors.BOLD)
+            self._inline(held, out)
+        elif kind in ("bullet", "number"):
+            indent = len(held) - len(held.lstrip(" \t"))
+            marker_end = held.index(" ", indent) if kind == "bullet" else held.index(".", indent) + 1
+            out.append(held[:indent] + Colors.BLUE + held[indent:marker_end] + Colors.END)
+            self._inline(held[marker_end:], out)
+        else:
+            self._inline(held, out)
+    
+    def _inline(self, text: str, out: list):
+        if not text:
+            return
+        if self.line_style == Colors.YELLOW:
+            out.append(text)
+            return
+        
+        pos = 0
+        while True:
+            tick = text.find("`", pos)
+            if tick == -1:
+                out.append(text[pos:])
+                return
+            out.append(text[pos:tick])
+            if self.in_code:
+                out.append("`" + Colors.END + self.line_style)
+            else:
+                out.append(Colors.YELLOW + "`")
+            self.in_code = not self.in_code
+            pos = tick + 1
+    
+    def _end_line(self, out: list):
+        if self.line_style or self.in_code:
+            out.append(Colors.END)
+        self.line_style = ""
+        self.in_code = False
+        self.at_line_start = True
+        out.append("\n")
+    
+    def feed(self, chunk: str) -> str:
+        out = []
+        pos = 0
+        length = len(chunk)
+        while pos < length:
+            if self.at_line_start:
+                char = chunk[pos]
+                pos += 1
+                if char == "\n":
+                    self._start_line(self._classify(self._held, complete=True), out)
+                    self._end_line(out)
+                    continue
+                self._held += char
+                kind = self._classify(self._held)
+                if kind is not None:
+                    self._start_line(kind, out)
+                continue
+            
+            newline = chunk.find("\n", pos)
+            end = length if newline == -1 else newline
+            self._inline(chunk[pos:end], out)
+            if newline == -1:
+                break
+            self._end_line(out)
+            pos = newline + 1
+        return "".join(out)
+    
+    def finish(self) -> str:
+        """Flush held text and close any open style at the end of the stream."""
+        out = []
+        if self._held:
+            self._start_line(self._classify(self._held, complete=True), out)
+        if self.line_style or self.in_code:
+            out.append(Colors.END)
+        self.line_style = ""
+        self.in_code = False
+        return "".join(out)
@@ -0,0 +1,60 @@
+# hub/utils/profiling.py
+import subprocess
+import sys
+from typing import List, Tuple
+
+from .formatting import print_bold, print_error, print_grey
+
+
+_PROFILE_SCRIPT = """
+import hub.cli
+from hub.clients import registry
+try:
+    registry.load_client_class({model!r})
+except ImportError:
+    pass
+"""
+
+
+def _parse_importtime(output: str) -> List[Tuple[int, int, str]]:
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            # Header line
+            continue
+        rows.append((self_us, cumulative_us, parts[2].rstrip()))
+    return rows
+
+
+def profile_startup(model: str, limit: int = 25) -> int:
+    """Print per-module import times for the `hub` startup path of ``model``.
+    
+    Runs a fresh interpreter with ``-X importtime`` so the numbers are not
+    skewed by modules already imported in this process.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROFILE_SCRIPT.format(model=model)],
+        capture_output=True,
+        text=True,
+    )
+    rows = _parse_importtime(proc.stderr)
+    if not rows:
+        print_error("Could not collect import timings")
+        return 1
+    
+    total_us = sum(row[0] for row in rows)
+    print_bold(f"Startup import profile (model: {model})")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, module in sorted(rows, reverse=True)[:limit]:
+        print(f"{self_us / 1000:9.2f} {cumulative_us / 1000:9.2f}  {module.strip()}")
+    print()
+    print_grey(f"{len(rows)} modules imported, total {total_us / 1000:.1f} ms")
+    return 0
@@ -0,0 +1,118 @@
+# hub/utils/stream.py
+import contextvars
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+from ..clients.base import current_usage, set_current_usage
+from ..metrics import current_stream_metrics, set_current_stream_metrics
+
+_DONE = object()
+
+
+class StreamPipeline:
+    """Decouples reading a response stream from drawing it.
+    
+    A reader thread drains ``chunks`` into a bounded queue, so a slow
+    terminal never stalls the provider socket. The caller's thread renders:
+    it writes whatever has arrived at most ``fps`` times per second, with
+    one write and one flush per frame. Text is accumulated in a list and
+    joined once, so the cost per chunk stays constant for long answers.
+    """
+    
+    def __init__(self, chunks: Iterable[str], write: Optional[Callable[[str], object]] = None,
+                 flush: Optional[Callable[[], object]] = None, fps: float = 30.0, max_queue: int = 4096):
+        self.chunks = chunks
+        self.write = write or sys.stdout.write
+        self.flush = flush or sys.stdout.flush
+        self.frame_interval = 1.0 / fps if fps > 0 else 0.0
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.parts: List[str] = []
+        self.frames = 0
+        self.render_time = 0.0
+        self._stop = threading.Event()
+        self._context = contextvars.copy_context()
+    
+    def _read(self):
+        iterator = iter(self.chunks)
+        try:
+            for chunk in iterator:
+                if self._stop.is_set():
+                    break
+                self.queue.put((chunk, None))
+        except BaseException as e:
+            self.queue.put((_DONE, e))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        self.queue.put((_DONE, None))
+    
+    def _render(self, pending: List[str]):
+        start = time.perf_counter()
+        self.write("".join(pending))
+        self.flush()
+        self.render_time += time.perf_counter() - start
+        self.frames += 1
+        pending.clear()
+    
+    def run(self) -> str:
+        """Stream everything to the terminal and return the full text."""
+        # The reader runs in a copy of this context so the stream's metrics
+        # and usage can be handed back to the caller afterwards
+        reader = threading.Thread(target=self._context.run, args=(self._read,), name="hub-stream-reader", daemon=True)
+        reader.start()
+        
+        pending: List[str] = []
+        next_frame = 0.0
+        error = None
+        done = False
+        try:
+            while not done:
+                timeout = max(next_frame - time.perf_counter(), 0.0) if pending else None
+                try:
+                    chunk, error = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    chunk = None
+                
+                done = chunk is _DONE
+                if chunk is not None and not done:
+                    pending.append(chunk)
+                    self.parts.append(chunk)
+                    # Coalesce everything already waiting into this frame
+                    while True:
+                        try:
+                            chunk, error = self.queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if chunk is _DONE:
+                            done = True
+                            break
+                        pending.append(chunk)
+                        self.parts.append(chunk)
+                
+                now = time.perf_counter()
+                if pending and (done or now >= next_frame):
+                    self._render(pending)
+                    next_frame = now + self.frame_interval
+        finally:
+            self._stop.set()
+            if done:
+                reader.join()
+                set_current_stream_metrics(self._context.run(current_stream_metrics))
+                set_current_usage(self._context.run(current_usage))
+            else:
+                # Interrupted: free queue space so the reader can notice the
+                # stop flag and close the stream, without waiting for it
+                while True:
+                    try:
+                        self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+        
+        if error is not None:
+            raise error
+        return "".join(self.parts)
@@ -25,6 +25,13 @@ def get_terminal_width() -> int:
         return 80
 
 
+def get_terminal_height() -> int:
+    try:
+        return os.get_terminal_size().lines
+    except OSError:
+        return 24
+
+
 def truncate_text(text: str, max_length: int) -> str:
     if len(text) <= max_length:
         return text
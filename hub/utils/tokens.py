@@ -0,0 +1,58 @@
+# hub/utils/tokens.py
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Rough per-message framing cost (role markers, separators)
+MESSAGE_OVERHEAD = 4
+
+# Average characters per token when no real tokenizer is available
+CHARS_PER_TOKEN = {
+    "openai": 4.0,
+    "grok": 4.0,
+    "claude": 3.5,
+    "gemini": 4.0,
+}
+
+# Providers whose tokenization is close enough to tiktoken's cl100k_base
+_TIKTOKEN_PROVIDERS = ("openai", "grok")
+_encoding = None
+_encoding_loaded = False
+
+
+def _tiktoken_encoding():
+    # tiktoken is optional; loaded once on first use
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, provider: Optional[str] = None) -> int:
+    """Local token count for ``text`` as ``provider`` would tokenize it.
+    
+    Uses tiktoken for OpenAI-compatible providers when installed, otherwise
+    a per-provider characters-per-token ratio. Results are cached per string.
+    """
+    if not text:
+        return 0
+    if provider in _TIKTOKEN_PROVIDERS:
+        encoding = _tiktoken_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    return int(len(text) / CHARS_PER_TOKEN.get(provider, 4.0)) + 1
+
+
+def estimate_tokens(text: Optional[str], provider: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    return count_tokens(text, provider)
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]], provider: Optional[str] = None) -> int:
+    return sum(estimate_tokens(m["content"], provider) + MESSAGE_OVERHEAD for m in messages)
@@ -0,0 +1,44 @@
+# tests/test_cache.py
+from hub.cache import CachedClient, ResponseCache
+from hub.clients.mock import MockClient
+
+
+def make_client(tmp_path):
+    mock = MockClient()
+    mock.configure(ttft=0.0, chunk_delay=0.0, response_chars=40)
+    cache = ResponseCache(str(tmp_path / "cache.db"), fuzzy_threshold=0.9)
+    return mock, CachedClient(mock, cache)
+
+
+def test_fuzzy_cache_serves_near_duplicate_prompts(tmp_path):
+    mock, client = make_client(tmp_path)
+    prompt = "Explain how the TCP three-way handshake establishes a connection between two hosts"
+    
+    first = client.chat(prompt)
+    assert client.chat(prompt + "?") == first
+    assert "".join(client.chat_stream(prompt + "!")) == first
+    assert mock.requests == 1
+    assert client.cache.fuzzy_hits == 2
+
+
+def test_fuzzy_cache_keeps_conversations_apart(tmp_path):
+    mock, client = make_client(tmp_path)
+    follow_up = {"role": "user", "content": "Can you give me a longer and more detailed example of that please"}
+    
+    client.chat([{"role": "user", "content": "Tell me about Python"}, {"role": "assistant", "content": "A language."}, follow_up])
+    client.chat([{"role": "user", "content": "Tell me about Rust"}, {"role": "assistant", "content": "A language."}, follow_up])
+    assert mock.requests == 2
+    assert client.cache.fuzzy_hits == 0
+
+
+def test_cache_hit_reports_zero_usage(tmp_path):
+    from hub.usage import UsageTracker
+    _, client = make_client(tmp_path)
+    usage = UsageTracker()
+    
+    for _ in range(2):
+        client.reset_usage()
+        response = client.chat("hi")
+        turn = usage.record(client, "hi", None, response)
+    assert not turn["estimated"]
+    assert turn["input_tokens"] == turn["output_tokens"] == 0
@@ -0,0 +1,42 @@
+# tests/test_cassettes.py
+import time
+
+from hub.cassettes import RecordingClient, ReplayClient, ReplayLibrary
+from hub.clients.mock import MockClient
+
+CHUNK_DELAY = 0.01
+CONSUMER_DELAY = 0.05
+
+
+def consume_slowly(chunks):
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        time.sleep(CONSUMER_DELAY)
+    return "".join(parts)
+
+
+def test_record_replay_round_trip_excludes_consumer_time(tmp_path):
+    mock = MockClient()
+    mock.configure(ttft=0.02, chunk_delay=CHUNK_DELAY, chunk_chars=10, response_chars=50)
+    recorder = RecordingClient(mock, str(tmp_path), "mock")
+    
+    text = consume_slowly(recorder.chat_stream("hi"))
+    library = ReplayLibrary(str(tmp_path))
+    assert len(library) == 1
+    (cassette,) = library.by_model["mock"]
+    delays = [delay for delay, _ in cassette["chunks"]]
+    assert len(delays) == 5
+    # Only the mock's own delays are recorded, not the consumer's sleeps
+    assert all(delay < CONSUMER_DELAY for delay in delays)
+    assert cassette["usage"] == mock.last_usage
+    
+    replay = ReplayClient(library, "mock", realtime=True)
+    start = time.perf_counter()
+    assert consume_slowly(replay.chat_stream("a prompt never recorded")) == text
+    elapsed = time.perf_counter() - start
+    assert elapsed >= sum(delays) + 5 * CONSUMER_DELAY
+    assert replay.last_usage == cassette["usage"]
+    metrics = replay.last_stream_metrics.as_dict()
+    assert metrics["chunks"] == 5
+    assert metrics["gap_mean"] < CONSUMER_DELAY
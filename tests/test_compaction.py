@@ -0,0 +1,81 @@
+# tests/test_compaction.py
+import pytest
+
+from hub.clients.mock import MockClient
+from hub.clients.pool import ClientPool
+from hub.compaction import AUTO_INSTRUCTIONS, SUMMARY_MARKER, AutoCompactor, Compactor
+from hub.usage import BudgetExceededError, UsageTracker
+
+
+def make_mock():
+    mock = MockClient()
+    mock.configure(ttft=0.001, chunk_delay=0.0, response_chars=120)
+    return mock
+
+
+def make_turns(count):
+    return [{"user": f"Question {i}: " + "details " * 40, "assistant": f"Answer {i}: " + "words " * 60}
+            for i in range(count)]
+
+
+def test_each_summary_request_records_its_own_usage():
+    totals = []
+    for concurrency in (1, 4):
+        usage = UsageTracker()
+        compactor = Compactor(usage, concurrency=concurrency, chunk_tokens=300)
+        compactor.compact(make_mock(), make_turns(12), AUTO_INSTRUCTIONS)
+        assert len(usage.turns) == compactor.requests > 1
+        assert not any(turn["estimated"] for turn in usage.turns)
+        totals.append(sorted(turn["input_tokens"] for turn in usage.turns))
+    # Concurrent requests report the same per-request usage as sequential ones
+    assert totals[0] == totals[1]
+
+
+def test_summary_requests_reserve_and_release_budget():
+    mock = make_mock()
+    usage = UsageTracker(budget=100.0)
+    usage.prices[mock.model_name] = {"input": 1.0, "output": 1.0}
+    reserved = []
+    chat = mock.chat
+    
+    def observed_chat(messages, system_prompt=None):
+        reserved.append(usage.reserved)
+        return chat(messages, system_prompt)
+    
+    mock.chat = observed_chat
+    Compactor(usage, concurrency=4, chunk_tokens=300).compact(mock, make_turns(12), AUTO_INSTRUCTIONS)
+    assert all(amount > 0 for amount in reserved)
+    assert usage.reserved == 0.0
+    assert usage.cost > 0
+
+
+def test_budget_error_waits_for_requests_in_flight():
+    mock = make_mock()
+    # Room for a few of the twelve chunk summaries
+    usage = UsageTracker(budget=0.002, expected_output=100)
+    usage.prices[mock.model_name] = {"input": 1.0, "output": 1.0}
+    
+    with pytest.raises(BudgetExceededError):
+        Compactor(usage, concurrency=4, chunk_tokens=300).compact(mock, make_turns(12), AUTO_INSTRUCTIONS)
+    assert 0 < mock.requests < 12
+    assert len(usage.turns) == mock.requests
+    assert usage.reserved == 0.0
+
+
+def test_background_compaction_runs_on_a_spare_client():
+    pool = ClientPool(lambda model: make_mock())
+    client = pool.get("mock")
+    usage = UsageTracker()
+    auto = AutoCompactor(Compactor(concurrency=4, chunk_tokens=300), threshold=500, usage=usage, spare=pool.spare)
+    history = make_turns(12)
+    
+    assert auto.maybe_start(client, history)
+    auto._thread.join()
+    compacted = auto.apply(history)
+    spare = pool.spare(client)
+    assert spare is not client
+    assert client.requests == 0
+    assert spare.requests == len(usage.turns) > 0
+    assert not any(turn["estimated"] for turn in usage.turns)
+    assert compacted[0]["user"] == SUMMARY_MARKER
+    assert compacted[1:] == history[-(len(compacted) - 1):]
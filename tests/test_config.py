@@ -0,0 +1,71 @@
+# tests/test_config.py
+import os
+
+import pytest
+import yaml
+
+from hub.config import Config
+
+
+def make_config(tmp_path, saves):
+    config = Config(str(tmp_path / "config.yaml"))
+    save_config = config.save_config
+    
+    def counting_save():
+        saves.append(1)
+        save_config()
+    
+    config.save_config = counting_save
+    return config
+
+
+def read_yaml(tmp_path):
+    with open(tmp_path / "config.yaml") as f:
+        return yaml.safe_load(f)
+
+
+def test_batch_saves_once_on_exit(tmp_path):
+    saves = []
+    config = make_config(tmp_path, saves)
+    
+    with config.batch():
+        config.set_default_model("claude")
+        config.set_system_prompt("Be brief.")
+        assert saves == []
+        assert not os.path.exists(tmp_path / "config.yaml")
+    assert len(saves) == 1
+    assert read_yaml(tmp_path) == {"default_model": "claude", "system_prompt": "Be brief."}
+
+
+def test_batch_saves_nothing_when_block_raises(tmp_path):
+    saves = []
+    config = make_config(tmp_path, saves)
+    config.set_default_model("claude")
+    
+    with pytest.raises(RuntimeError):
+        with config.batch():
+            config.set_default_model("openai")
+            config.set_system_prompt("Be brief.")
+            raise RuntimeError("interrupted")
+    assert len(saves) == 1
+    assert read_yaml(tmp_path) == {"default_model": "claude"}
+    assert config.default_model == "claude"
+    assert config.system_prompt is None
+
+
+def test_atomic_write_leaves_no_temp_file(tmp_path):
+    config = Config(str(tmp_path / "config.yaml"))
+    
+    config.set_default_model("claude")
+    config.set_default_model("openai")
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")]
+    assert Config(str(tmp_path / "config.yaml")).default_model == "openai"
+
+
+def test_plugin_api_key_comes_from_captured_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACME_API_KEY", "from-env")
+    config = Config(str(tmp_path / "config.yaml"))
+    monkeypatch.delenv("ACME_API_KEY")
+    
+    assert config.get_api_key("acme") == "from-env"
+    assert Config(str(tmp_path / "config.yaml")).get_api_key("acme") is None
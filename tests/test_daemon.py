@@ -0,0 +1,114 @@
+# tests/test_daemon.py
+import json
+import os
+import re
+import socket
+import threading
+import time
+
+import pytest
+import yaml
+
+from hub import daemon
+from hub.utils.tokens import MESSAGE_OVERHEAD, estimate_tokens
+
+
+def write_config(path, response_chars):
+    settings = {
+        "default_model": "mock",
+        "prewarm": False,
+        "cache": False,
+        "mock": {"ttft": 0.0, "chunk_delay": 0.001, "response_chars": response_chars},
+    }
+    with open(path, "w") as f:
+        yaml.safe_dump(settings, f)
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    for key in list(os.environ):
+        if key.endswith("_API_KEY"):
+            monkeypatch.delenv(key)
+    for key in (daemon.DISABLE_ENV, daemon.TRACE_ENV):
+        monkeypatch.delenv(key, raising=False)
+    path = str(tmp_path / "config.yaml")
+    write_config(path, 40)
+    
+    server = daemon.Daemon(path)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while daemon.request("status", path) is None:
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.01)
+    yield path
+    daemon.request("stop", path)
+    thread.join(5)
+
+
+def ask(config_path, prompt, **options):
+    """The daemon's replies to one prompt."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(daemon.socket_path(config_path))
+    message = dict(options, command="prompt", prompt=prompt, keys=daemon.key_fingerprint(os.environ))
+    try:
+        sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        return [json.loads(line) for line in sock.makefile("r", encoding="utf-8")]
+    finally:
+        sock.close()
+
+
+def answer(replies):
+    return "".join(reply["chunk"] for reply in replies if "chunk" in reply)
+
+
+def input_tokens(replies):
+    return int(re.match(r"(\d+) in", replies[-1]["usage"]).group(1))
+
+
+def test_concurrent_requests_report_their_own_usage(config_path):
+    prompts = [f"prompt {i} " + "word " * (i * 50) for i in range(4)]
+    replies = [None] * len(prompts)
+    
+    def run(i):
+        replies[i] = ask(config_path, prompts[i], usage=True)
+    
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for prompt, reply in zip(prompts, replies):
+        assert reply[-1]["done"]
+        assert input_tokens(reply) == estimate_tokens(prompt, "mock") + MESSAGE_OVERHEAD
+    assert len({input_tokens(reply) for reply in replies}) == len(prompts)
+
+
+def test_config_change_is_picked_up(config_path):
+    assert len(answer(ask(config_path, "first"))) == 40
+    write_config(config_path, 120)
+    assert len(answer(ask(config_path, "second"))) == 120
+
+
+def test_errors_fall_back_safely(config_path, monkeypatch):
+    # A model that cannot be built is an error reply; the daemon keeps serving
+    replies = ask(config_path, "hi", model="no-such-model")
+    assert "error" in replies[-1]
+    assert answer(ask(config_path, "hi"))
+    
+    # Other API keys than the daemon's: declined, the caller runs in-process
+    monkeypatch.setenv("ACME_API_KEY", "different")
+    assert ask(config_path, "hi") == [{"declined": True}]
+    assert daemon.forward(["-c", config_path, "hi"]) is None
+    monkeypatch.delenv("ACME_API_KEY")
+    
+    monkeypatch.setenv(daemon.TRACE_ENV, "trace.json")
+    assert daemon.forward(["-c", config_path, "hi"]) is None
+    monkeypatch.delenv(daemon.TRACE_ENV)
+    
+    daemon.request("stop", config_path)
+    deadline = time.monotonic() + 5
+    while os.path.exists(daemon.socket_path(config_path)):
+        assert time.monotonic() < deadline, "daemon did not stop"
+        time.sleep(0.01)
+    assert daemon.forward(["-c", config_path, "hi"]) is None
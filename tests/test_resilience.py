@@ -0,0 +1,39 @@
+# tests/test_resilience.py
+from hub.clients.mock import MockClient
+from hub.resilience import ResilientClient, RetryPolicy
+
+
+def make_client(error_rate, built):
+    primary = MockClient()
+    primary.configure(ttft=0.0, chunk_delay=0.0, response_chars=40, error_rate=error_rate)
+    
+    def client_factory(model):
+        fallback = MockClient()
+        fallback.configure(ttft=0.0, chunk_delay=0.0, response_chars=40)
+        built.append(model)
+        return fallback
+    
+    return ResilientClient(primary, RetryPolicy(max_retries=0), ["backup"], client_factory)
+
+
+def test_reset_usage_never_builds_fallbacks():
+    built = []
+    client = make_client(0.0, built)
+    
+    for _ in range(3):
+        client.reset_usage()
+        client.chat("hi")
+    assert built == []
+    assert client.last_usage is not None
+
+
+def test_failover_builds_fallback_once_and_resets_it():
+    built = []
+    client = make_client(1.0, built)
+    
+    assert client.chat("hi")
+    assert client.chat("hi")
+    assert built == ["backup"]
+    client.reset_usage()
+    assert client.last_usage is None
+    assert client._fallbacks["backup"].last_usage is None
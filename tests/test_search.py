@@ -0,0 +1,27 @@
+# tests/test_search.py
+from hub.search import SearchIndex
+from hub.sessions import SessionLog
+
+
+def test_search_finds_indexed_turns(tmp_path):
+    log = SessionLog(str(tmp_path / "sessions"))
+    log.append_turn("How do I reverse a list in Python?", "Use reversed() or slicing.", model="mock")
+    log.append_turn("What is a Rust borrow checker?", "It enforces ownership rules.", model="mock")
+    index = SearchIndex(str(tmp_path / "search.db"))
+    
+    assert index.sync_session(log.path) == 2
+    log.append_turn("Explain Python generators", "They yield values lazily.", model="mock")
+    log.close()
+    # Only the new record is read on the next sync
+    assert index.sync_session(log.path) == 1
+    assert index.sync_session(log.path) == 0
+    assert index.count() == 3
+    
+    results = index.search("python")
+    assert len(results) == 2
+    assert {result["session"] for result in results} == {log.session_id}
+    assert all("\x02" in result["snippet"] for result in results)
+    assert len(index.search("borrow checker")) == 1
+    assert len(index.search("gen*")) == 1
+    assert index.search("haskell") == []
+    index.close()
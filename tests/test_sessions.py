@@ -0,0 +1,64 @@
+# tests/test_sessions.py
+import os
+
+from hub.sessions import SessionLog
+
+
+def write_session(directory, turns, system_prompt=None):
+    log = SessionLog(str(directory))
+    if system_prompt is not None:
+        log.append_system(system_prompt)
+    for i in range(turns):
+        log.append_turn(f"q{i}", f"a{i}", model="mock")
+    log.close()
+    return log.session_id
+
+
+def users(state):
+    return [turn["user"] for turn in state["turns"]]
+
+
+def test_resume_reads_tail_through_sidecars(tmp_path):
+    session_id = write_session(tmp_path, 20, system_prompt="Be brief.")
+    assert os.path.getsize(tmp_path / f"{session_id}.idx") == 21 * 8
+    assert os.path.exists(tmp_path / f"{session_id}.sys")
+    
+    log = SessionLog(str(tmp_path), session_id)
+    state = log.load(limit=3)
+    assert users(state) == ["q17", "q18", "q19"]
+    assert state["system_prompt"] == "Be brief."
+    assert log.records == 21
+
+
+def test_torn_last_line_is_repaired(tmp_path):
+    session_id = write_session(tmp_path, 3)
+    with open(tmp_path / f"{session_id}.jsonl", "ab") as f:
+        f.write(b'{"type": "turn", "user": "q3", "assis')
+    # A crash before the index was written leaves it short too
+    with open(tmp_path / f"{session_id}.idx", "r+b") as f:
+        f.truncate(8)
+    
+    log = SessionLog(str(tmp_path), session_id)
+    assert log.records == 3
+    assert users(log.load()) == ["q0", "q1", "q2"]
+    log.append_turn("q3", "a3")
+    assert users(log.load()) == ["q0", "q1", "q2", "q3"]
+    log.close()
+    with open(tmp_path / f"{session_id}.jsonl", "rb") as f:
+        assert all(line.endswith(b"}\n") for line in f)
+
+
+def test_resume_keeps_state_older_than_the_window(tmp_path):
+    log = SessionLog(str(tmp_path))
+    log.append_system("Answer in French.")
+    for i in range(5):
+        log.append_turn(f"q{i}", f"a{i}")
+    log.append_turn("summary", "Summary of q0-q2.", reset=True, keep=2)
+    for i in range(5, 8):
+        log.append_turn(f"q{i}", f"a{i}")
+    log.close()
+    
+    # The window holds the compaction and the turns after it
+    state = SessionLog(str(tmp_path), log.session_id).load(limit=4)
+    assert users(state) == ["summary", "q3", "q4", "q5", "q6", "q7"]
+    assert state["system_prompt"] == "Answer in French."
@@ -0,0 +1,51 @@
+# tests/test_stream.py
+import pytest
+
+from hub.clients.base import current_usage
+from hub.clients.errors import OverloadedError
+from hub.clients.mock import MockClient, mock_text
+from hub.metrics import current_stream_metrics
+from hub.utils.stream import StreamPipeline
+
+
+def make_pipeline(chunks, written, fps=30.0):
+    return StreamPipeline(chunks, write=written.append, flush=lambda: None, fps=fps)
+
+
+def test_pipeline_delivers_all_chunks_in_order():
+    mock = MockClient()
+    mock.configure(ttft=0.0, chunk_delay=0.001, chunk_chars=3, response_chars=600)
+    written = []
+    
+    text = make_pipeline(mock.chat_stream("hi"), written).run()
+    assert text == "".join(written) == mock_text(600)
+    assert current_stream_metrics().chunks == 200
+    assert current_usage() == mock.last_usage
+
+
+def test_pipeline_renders_every_chunk_without_frame_limit():
+    chunks = [f"{i} " for i in range(500)]
+    written = []
+    
+    assert make_pipeline(iter(chunks), written, fps=0).run() == "".join(chunks)
+    assert "".join(written) == "".join(chunks)
+
+
+def test_pipeline_raises_producer_error_in_consumer():
+    mock = MockClient()
+    mock.configure(ttft=0.0, chunk_delay=0.0, error_rate=1.0)
+    
+    with pytest.raises(OverloadedError):
+        make_pipeline(mock.chat_stream("hi"), []).run()
+
+
+def test_pipeline_keeps_text_before_a_mid_stream_error():
+    def chunks():
+        yield "partial "
+        yield "answer"
+        raise ConnectionError("stream dropped")
+    
+    pipeline = make_pipeline(chunks(), [])
+    with pytest.raises(ConnectionError):
+        pipeline.run()
+    assert "".join(pipeline.parts) == "partial answer"